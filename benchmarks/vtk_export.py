@@ -0,0 +1,117 @@
+"""Benchmark of the VTK export on a synthetic mesh of about 100k faces.
+
+Compares the previous list based build_vtk_mesh, which went through
+as_lists, list comprehensions, a math.atan2 loop and compute_cell_sizes,
+with the array based one, and the legacy .vtk output with compressed .vtu.
+
+    python benchmarks/vtk_export.py [n_faces]
+"""
+
+import math
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pyvista as pv
+from cgfoil.core.vtk import build_vtk_mesh
+from cgfoil.models import MeshResult
+from cgfoil.utils.summary import face_areas
+
+
+def synthetic_result(n_faces: int) -> MeshResult:
+    """A triangulated unit square with about n_faces faces."""
+    n = max(int(math.sqrt(n_faces / 2)), 1)
+    xs, ys = np.meshgrid(np.linspace(0, 1, n + 1), np.linspace(0, 1, n + 1))
+    vertices = np.column_stack((xs.ravel(), ys.ravel()))
+    corner = (np.arange(n)[:, None] * (n + 1) + np.arange(n)[None, :]).ravel()
+    faces = np.vstack(
+        (
+            np.column_stack((corner, corner + 1, corner + n + 2)),
+            np.column_stack((corner, corner + n + 2, corner + n + 1)),
+        )
+    )
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(-np.pi, np.pi, len(faces))
+    inplanes = np.column_stack((np.cos(angles), np.sin(angles)))
+    return MeshResult(
+        vertices=vertices,
+        faces=faces,
+        outer_points=vertices[:4],
+        inner_list=[],
+        line_ply_list=[],
+        untrimmed_lines=[],
+        web_material_ids=[],
+        skin_material_ids=[0, 1],
+        web_names=[],
+        face_normals=inplanes[:, ::-1] * [1, -1],
+        face_material_ids=rng.integers(0, 2, len(faces)),
+        face_inplanes=inplanes,
+        face_areas=face_areas(vertices, faces),
+        areas={},
+        skin_ply_thicknesses=[],
+        web_ply_thicknesses=[],
+    )
+
+
+def build_vtk_mesh_lists(mesh_result):
+    """The list based build_vtk_mesh this benchmark compares against."""
+    mesh_result = mesh_result.as_lists()
+    mesh_obj = pv.UnstructuredGrid(
+        np.array(mesh_result.faces).flatten(),
+        [pv.CellType.TRIANGLE] * len(mesh_result.faces),
+        mesh_result.vertices,
+    )
+    mesh_obj.cell_data["material_id"] = mesh_result.face_material_ids
+    mesh_obj.cell_data["normals"] = np.array(
+        [[n[0], n[1], 0.0] for n in mesh_result.face_normals]
+    )
+    mesh_obj.cell_data["inplane"] = np.array(
+        [[i[0], i[1], 0.0] for i in mesh_result.face_inplanes]
+    )
+    plane_orientations = []
+    for ix, iy in mesh_result.face_inplanes:
+        angle = math.degrees(math.atan2(iy, ix))
+        angle = (angle + 90) % 180 - 90
+        plane_orientations.append(angle)
+    mesh_obj.cell_data["plane_orientations"] = plane_orientations
+    mesh_obj.cell_data["offset_normals"] = np.array(
+        [[-n[0], -n[1], 0.0] for n in mesh_result.face_normals]
+    )
+    return mesh_obj.compute_cell_sizes()
+
+
+def best_of(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        times.append(time.perf_counter() - start)
+    return min(times), value
+
+
+def main(n_faces: int = 100_000):
+    mesh_result = synthetic_result(n_faces)
+    print(f"{len(mesh_result.faces)} faces, {len(mesh_result.vertices)} vertices")
+    t_lists, grid_lists = best_of(lambda: build_vtk_mesh_lists(mesh_result))
+    t_arrays, grid = best_of(lambda: build_vtk_mesh(mesh_result))
+    for name in grid_lists.cell_data.keys():
+        np.testing.assert_allclose(
+            grid.cell_data[name], grid_lists.cell_data[name], atol=1e-9
+        )
+    print(f"build, lists:  {t_lists * 1e3:8.1f} ms")
+    print(f"build, arrays: {t_arrays * 1e3:8.1f} ms  ({t_lists / t_arrays:.1f}x)")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for label, filename, grid_, kwargs in (
+            ("lists, .vtk", "lists.vtk", grid_lists, {}),
+            ("arrays, .vtk", "arrays.vtk", grid, {"binary": True}),
+            ("arrays, .vtu", "arrays.vtu", grid, {"compression": "zlib"}),
+        ):
+            path = os.path.join(tmpdir, filename)
+            t_save, _ = best_of(lambda: grid_.save(path, **kwargs))
+            size = os.path.getsize(path) / 2**20
+            print(f"save, {label}: {t_save * 1e3:8.1f} ms  {size:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -1,145 +1,119 @@
 """Demonstrates airfoil meshing from a VTP file with multi-section processing."""
 
 import os
-import multiprocessing
-from cgfoil.core.main import run_cgfoil
-from cgfoil.models import Skin, Web, Ply, AirfoilMesh, Thickness
-
-try:
-    import pyvista as pv
-except ImportError:
-    raise ImportError("pyvista is required for this example")
+import traceback
+import numpy as np
+from cgfoil.core.batch import generate_meshes
+from cgfoil.models import (
+    AirfoilMesh,
+    BatchError,
+    BatchReport,
+    Ply,
+    Skin,
+    Thickness,
+    Web,
+)
+from cgfoil.utils.io import save_mesh_to_vtk
+from cgfoil.utils.vtp import read_sections
 
 # Rotation angle around z-axis
 ROTATION_ANGLE = 90
 
 
-def process_single_section(args):
-    """Process a single section_id."""
-    section_id, vtp_file, output_base_dir = args
-    try:
-        print(f"Starting processing section_id: {section_id}")
-        # Load VTP file in each process to avoid serialization issues
-        mesh_vtp = pv.read(vtp_file).rotate_z(ROTATION_ANGLE)
-
-        # Create subdirectory
-        section_dir = os.path.join(output_base_dir, f"section_{section_id}")
-        os.makedirs(section_dir, exist_ok=True)
-
-        # Filter mesh for this section_id
-        section_mesh = mesh_vtp.threshold(
-            value=(section_id, section_id), scalars="section_id"
-        )
+def section_mesh(section, output_base_dir):
+    """Build the AirfoilMesh of one section from its panel arrays."""
+    # Create subdirectory
+    section_dir = os.path.join(output_base_dir, f"section_{section.section_id}")
+    os.makedirs(section_dir, exist_ok=True)
 
-        # Extract airfoil (assuming panel_id logic similar to original)
-        airfoil = section_mesh.threshold(value=(0, 12), scalars="panel_id")
-        te = section_mesh.threshold(value=(-3, -3), scalars="panel_id")
-        points_2d = airfoil.points[:, :2].tolist()[:-1] + te.points[:, :2].tolist()[1:]
-
-        # Extract webs
-        web1 = section_mesh.threshold(value=(-1, -1), scalars="panel_id")
-        web2 = section_mesh.threshold(value=(-2, -2), scalars="panel_id")
-        web_points_2d_1 = web1.points[:, :2].tolist()
-        web_points_2d_2 = web2.points[:, :2].tolist()
-
-        # Get thicknesses (assuming similar to original)
-        ply_000001_plate_100_thickness = (
-            list(
-                (
-                    airfoil.cell_data_to_point_data().point_data[
-                        "ply_000001_plate_100_thickness"
-                    ]
-                    * 0.01
-                )
-                + 0.04
-            )[:-1]
-            + list(
-                te.cell_data_to_point_data().point_data[
-                    "ply_000001_plate_100_thickness"
-                ]
-                * 1
-                + 0.04
-            )[1:]
+    # Skin thickness from the first ply, the scaling is arbitrary
+    name = "ply_000001_plate_100_thickness"
+    ply_000001_plate_100_thickness = np.concatenate(
+        (
+            (section.airfoil.point_data[name] * 0.01 + 0.04)[:-1],
+            (section.te.point_data[name] * 1 + 0.04)[1:],
         )
-
-        web_ply_thickness_1 = [0.004] * len(web_points_2d_1)
-        web_ply_thickness_2 = [0.004] * len(web_points_2d_2)
-
-        # Define skins
-        skins = {
-            "skin": Skin(
-                thickness=Thickness(type="array", array=ply_000001_plate_100_thickness),
-                material=1,
-                sort_index=1,
-            ),
-        }
-
-        # Define webs
-        web_definition = {
-            "web1": Web(
-                coord_input=web_points_2d_1,
-                plies=[
-                    Ply(
-                        thickness=Thickness(type="array", array=web_ply_thickness_1),
-                        material=2,
+    )
+
+    # Define skins
+    skins = {
+        "skin": Skin(
+            thickness=Thickness(type="array", array=ply_000001_plate_100_thickness),
+            material=1,
+            sort_index=1,
+        ),
+    }
+
+    # Define webs
+    web_definition = {}
+    for web_name, material, normal_ref in (
+        ("web1", 2, [1, 0]),
+        ("web2", 3, [-1, 0]),
+    ):
+        web_points = section.webs[web_name].points
+        web_definition[web_name] = Web(
+            coord_input=web_points,
+            plies=[
+                Ply(
+                    thickness=Thickness(
+                        type="array", array=np.full(len(web_points), 0.004)
                     ),
-                ],
-                normal_ref=[1, 0],
-            ),
-            "web2": Web(
-                coord_input=web_points_2d_2,
-                plies=[
-                    Ply(
-                        thickness=Thickness(type="array", array=web_ply_thickness_2),
-                        material=3,
-                    ),
-                ],
-                normal_ref=[-1, 0],
-            ),
-        }
-
-        # Create AirfoilMesh
-        mesh = AirfoilMesh(
-            skins=skins,
-            webs=web_definition,
-            airfoil_input=points_2d,
-            n_elem=None,
-            plot=False,  # Disable plotting in parallel to avoid issues
-            plot_filename=None,
-            vtk=os.path.join(section_dir, "output.vtk"),
+                    material=material,
+                ),
+            ],
+            normal_ref=normal_ref,
         )
 
-        # Run the meshing
-        run_cgfoil(mesh)
-        print(f"Completed processing section_id: {section_id}")
-    except Exception as e:
-        print(f"Error processing section_id {section_id}: {e}")
+    # Create AirfoilMesh
+    return AirfoilMesh(
+        skins=skins,
+        webs=web_definition,
+        airfoil_input=section.outline(),
+        n_elem=None,
+        plot=False,
+        plot_filename=None,
+        vtk=os.path.join(section_dir, "output.vtk"),
+    )
 
 
 def process_vtp_multi_section(
     vtp_file: str, output_base_dir: str, num_processes: int = None
 ):
-    """Process VTP file for all unique section_ids, outputting to subdirectories."""
-    # Load VTP file to get unique ids
-    mesh_vtp = pv.read(vtp_file).rotate_z(ROTATION_ANGLE)
-
-    # Get unique section_ids
-    if "section_id" not in mesh_vtp.cell_data:
-        raise ValueError("section_id not found in VTP file")
-    unique_section_ids = mesh_vtp.cell_data["section_id"]
-    unique_ids = sorted(set(unique_section_ids))
-    total_sections = len(unique_ids)
-    print(f"Found {total_sections} unique section_ids: {unique_ids}")
-
-    # Prepare arguments for multiprocessing
-    args_list = [(section_id, vtp_file, output_base_dir) for section_id in unique_ids]
-
-    # Use multiprocessing Pool
-    if num_processes is None:
-        num_processes = min(multiprocessing.cpu_count(), total_sections)
-    print(f"Using {num_processes} processes")
-    with multiprocessing.Pool(processes=num_processes) as pool:
-        pool.map(process_single_section, args_list)
+    """Process VTP file for all unique section_ids, outputting to subdirectories.
+
+    The file is read once, workers only receive the arrays of their section."""
+    sections = read_sections(vtp_file, rotate_z=ROTATION_ANGLE)
+    unique_ids = list(sections)
+    print(f"Found {len(unique_ids)} unique section_ids: {unique_ids}")
+
+    meshes = {}
+    report = BatchReport()
+    for section_id, section in sections.items():
+        try:
+            meshes[str(section_id)] = section_mesh(section, output_base_dir)
+        except (KeyError, ValueError) as e:
+            # Sections without a usable definition count as failed tasks
+            report.n_tasks += 1
+            report.errors.append(
+                BatchError(
+                    name=str(section_id),
+                    error_type=type(e).__name__,
+                    message=str(e),
+                    traceback=traceback.format_exc(),
+                )
+            )
+
+    for section_id, mesh_result in generate_meshes(
+        meshes, jobs=num_processes, report=report
+    ):
+        mesh = meshes[section_id]
+        save_mesh_to_vtk(mesh_result, mesh, mesh.vtk)
+        print(f"Completed processing section_id: {section_id}")
+
+    for error in report.errors:
+        print(f"Error processing section_id {error.name}: {error.message}")
+    print(f"Meshed {len(report.succeeded)} of {report.n_tasks} sections")
+    return report
 
 
 # Example usage
@@ -0,0 +1,68 @@
+"""Batch command functionality."""
+
+import os
+import sys
+from cgfoil.utils.logger import logger
+
+
+def _output_names(files):
+    """Unique output names for the YAML files, from their file names."""
+    names = []
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = stem
+        count = 1
+        while name in names:
+            count += 1
+            name = f"{stem}_{count}"
+        names.append(name)
+    return names
+
+
+def batch_mesh(
+    yaml_files,
+    output_dir: str = "batch_output",
+    jobs: int = None,
+    vtk: bool = False,
+    cache_dir: str = None,
+    no_cache: bool = False,
+    plot: bool = False,
+):
+    """Mesh many YAML files in parallel, writing one mesh file per input, with
+    plot also a PNG, and a JSON report of the run."""
+    from cgfoil.core.batch import collect_yaml_files, generate_meshes
+    from cgfoil.core.cache import resolve_cache_dir
+    from cgfoil.models import BatchReport
+    from cgfoil.utils.io import save_mesh_to_vtk
+    from cgfoil.utils.meshio import save_mesh
+
+    files = collect_yaml_files(yaml_files)
+    if not files:
+        print("No YAML files found", file=sys.stderr)
+        sys.exit(1)
+    os.makedirs(output_dir, exist_ok=True)
+    report = BatchReport()
+    tasks = dict(zip(_output_names(files), files))
+    results = generate_meshes(
+        tasks,
+        jobs=jobs,
+        report=report,
+        cache_dir=resolve_cache_dir(cache_dir, no_cache),
+        plot_dir=output_dir if plot else None,
+    )
+    for name, mesh_result in results:
+        save_mesh(mesh_result, os.path.join(output_dir, f"{name}.pck"))
+        if vtk:
+            save_mesh_to_vtk(mesh_result, None, os.path.join(output_dir, f"{name}.vtu"))
+    report_file = os.path.join(output_dir, "batch_report.json")
+    with open(report_file, "w") as f:
+        f.write(report.model_dump_json(indent=2))
+    logger.info(
+        f"Meshed {len(report.succeeded)} of {report.n_tasks} files, "
+        f"report saved to {report_file}"
+    )
+    if report.errors:
+        for error in report.errors:
+            print(f"{error.name}: {error.error_type}: {error.message}", file=sys.stderr)
+        sys.exit(1)
+    return report
@@ -7,6 +7,8 @@ from cgfoil.cli.export import export_mesh_to_vtk, export_mesh_to_anba
 from cgfoil.cli.summary import summarize_mesh
 from cgfoil.cli.full import full_mesh
 from cgfoil.cli.run import run_defaults
+from cgfoil.cli.batch import batch_mesh
+from cgfoil.cli.convert import convert_mesh
 
 app = cli(
     name="cgfoil",
@@ -32,13 +34,29 @@ mesh_cmd = command(
         option(
             flags=["--output-mesh", "-o"],
             arg_type=str,
-            help="Output mesh file (pickle)",
+            help="Output binary mesh file",
         ),
         option(
             flags=["--vtk"],
             dest="vtk_file",
             arg_type=str,
-            help="Output VTK file",
+            help="Output VTK file, .vtu (compressed) or legacy .vtk",
+        ),
+        option(
+            flags=["--cache-dir"],
+            arg_type=str,
+            help="Mesh cache directory (default: $CGFOIL_CACHE_DIR)",
+        ),
+        option(
+            flags=["--no-cache"],
+            arg_type=bool,
+            flag=True,
+            help="Do not use the mesh cache",
+        ),
+        option(
+            flags=["--profile"],
+            arg_type=str,
+            help="Write stage timings and counters as JSON to file (- for stdout)",
         ),
     ],
     sort_key=1,
@@ -50,7 +68,7 @@ plot_cmd = command(
     help="Plot an existing mesh.",
     callback=plot_existing_mesh,
     arguments=[
-        argument(name="mesh_file", arg_type=str, help="Path to mesh file (pickle)"),
+        argument(name="mesh_file", arg_type=str, help="Path to mesh file"),
     ],
     options=[
         option(
@@ -81,17 +99,21 @@ vtk_cmd = command(
         argument(
             name="mesh_file",
             arg_type=str,
-            help="Path to mesh file (pickle)",
+            help="Path to mesh file",
             sort_key=-1,
         ),
-        argument(name="vtk_file", arg_type=str, help="Output VTK file"),
+        argument(
+            name="vtk_file",
+            arg_type=str,
+            help="Output VTK file, .vtu (compressed) or legacy .vtk",
+        ),
     ],
     options=[
         option(
             flags=["--output", "-o"],
             dest="vtk_file",
             arg_type=str,
-            help="Output VTK file",
+            help="Output VTK file, .vtu (compressed) or legacy .vtk",
         ),
     ],
 )
@@ -105,7 +127,7 @@ anba_cmd = command(
         argument(
             name="mesh_file",
             arg_type=str,
-            help="Path to mesh file (pickle)",
+            help="Path to mesh file",
             sort_key=-1,
         ),
         argument(name="anba_file", arg_type=str, help="Output ANBA file"),
@@ -132,7 +154,7 @@ summary_cmd = command(
     help="Summarize areas and masses from mesh file.",
     callback=summarize_mesh,
     arguments=[
-        argument(name="mesh_file", arg_type=str, help="Path to mesh file (pickle)"),
+        argument(name="mesh_file", arg_type=str, help="Path to mesh file"),
     ],
     options=[
         option(
@@ -164,6 +186,22 @@ full_cmd = command(
             arg_type=str,
             help="Output directory",
         ),
+        option(
+            flags=["--cache-dir"],
+            arg_type=str,
+            help="Mesh cache directory (default: $CGFOIL_CACHE_DIR)",
+        ),
+        option(
+            flags=["--no-cache"],
+            arg_type=bool,
+            flag=True,
+            help="Do not use the mesh cache",
+        ),
+        option(
+            flags=["--profile"],
+            arg_type=str,
+            help="Write stage timings and counters as JSON to file (- for stdout)",
+        ),
     ],
     sort_key=4,
 )
@@ -183,7 +221,7 @@ run_cmd = command(
         option(
             flags=["--vtk", "-v"],
             arg_type=str,
-            help="Output VTK file",
+            help="Output VTK file, .vtu (compressed) or legacy .vtk",
         ),
         option(
             flags=["--file", "-f"],
@@ -197,11 +235,97 @@ run_cmd = command(
             default=False,
             help="Enable split view plotting",
         ),
+        option(
+            flags=["--cache-dir"],
+            arg_type=str,
+            help="Mesh cache directory (default: $CGFOIL_CACHE_DIR)",
+        ),
+        option(
+            flags=["--no-cache"],
+            arg_type=bool,
+            flag=True,
+            help="Do not use the mesh cache",
+        ),
+        option(
+            flags=["--profile"],
+            arg_type=str,
+            help="Write stage timings and counters as JSON to file (- for stdout)",
+        ),
     ],
     sort_key=5,
 )
 app.commands.append(run_cmd)
 
+batch_cmd = command(
+    name="batch",
+    help="Mesh many YAML files in parallel.",
+    callback=batch_mesh,
+    arguments=[
+        argument(
+            name="yaml_files",
+            arg_type=str,
+            nargs="+",
+            help="YAML files, directories or glob patterns",
+        ),
+    ],
+    options=[
+        option(
+            flags=["--output-dir", "-o"],
+            arg_type=str,
+            default="batch_output",
+            help="Output directory",
+        ),
+        option(
+            flags=["--jobs", "-n"],
+            arg_type=int,
+            help="Number of worker processes (default: one per CPU)",
+        ),
+        option(
+            flags=["--vtk", "-v"],
+            arg_type=bool,
+            default=False,
+            help="Also write a compressed .vtu file per mesh",
+        ),
+        option(
+            flags=["--plot", "-p"],
+            arg_type=bool,
+            default=False,
+            help="Also write a PNG plot per mesh",
+        ),
+        option(
+            flags=["--cache-dir"],
+            arg_type=str,
+            help="Mesh cache directory (default: $CGFOIL_CACHE_DIR)",
+        ),
+        option(
+            flags=["--no-cache"],
+            arg_type=bool,
+            flag=True,
+            help="Do not use the mesh cache",
+        ),
+    ],
+    sort_key=6,
+)
+app.commands.append(batch_cmd)
+
+convert_cmd = command(
+    name="convert",
+    help="Convert a legacy pickle mesh file to the binary mesh format. "
+    "Only use this on files you trust, loading a pickle can run arbitrary code.",
+    callback=convert_mesh,
+    arguments=[
+        argument(
+            name="mesh_file",
+            arg_type=str,
+            help="Path to legacy pickle mesh file",
+            sort_key=-1,
+        ),
+        argument(name="output_mesh", arg_type=str, help="Output binary mesh file"),
+    ],
+    sort_key=7,
+)
+app.commands.append(convert_cmd)
+
 
 def main():
     app.run()
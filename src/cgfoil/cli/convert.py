@@ -0,0 +1,12 @@
+"""Convert command functionality."""
+
+from cgfoil.utils.logger import logger
+
+
+def convert_mesh(mesh_file: str, output_mesh: str):
+    """Convert a trusted legacy pickle mesh file to the binary mesh format."""
+    from cgfoil.utils.meshio import load_mesh, save_mesh
+
+    mesh_result = load_mesh(mesh_file, allow_pickle=True)
+    save_mesh(mesh_result, output_mesh)
+    logger.info(f"Mesh saved to {output_mesh}")
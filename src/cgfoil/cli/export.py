@@ -1,22 +1,25 @@
 """Export utilities for cgfoil."""
 
 import json
-import pickle
-from ..core.anba import build_anba_data
-from ..utils.io import save_mesh_to_vtk
+from ..utils.profile import stage
 
 
-def export_mesh_to_vtk(mesh_file: str, vtk_file: str) -> None:
-    """Export mesh result to VTK file."""
-    with open(mesh_file, "rb") as f:
-        mesh_result = pickle.load(f)
-    save_mesh_to_vtk(mesh_result, None, vtk_file)
+def export_mesh_to_vtk(mesh_file: str, vtk_file: str) -> str:
+    """Export mesh result to VTK file, returns the path written."""
+    from ..utils.io import save_mesh_to_vtk
+    from ..utils.meshio import load_mesh
 
+    mesh_result = load_mesh(mesh_file)
+    return save_mesh_to_vtk(mesh_result, None, vtk_file)
 
+
+@stage("export_anba")
 def export_mesh_to_anba(mesh_file: str, anba_file: str, matdb=None) -> None:
     """Export mesh result to ANBA JSON format."""
-    with open(mesh_file, "rb") as f:
-        mesh_result = pickle.load(f)
+    from ..core.anba import build_anba_data
+    from ..utils.meshio import load_mesh
+
+    mesh_result = load_mesh(mesh_file)
     if isinstance(matdb, str):
         with open(matdb, "r") as f:
             matdb = json.load(f)
@@ -1,11 +1,10 @@
 """Plot command functionality."""
 
-import pickle
-from cgfoil.core.main import plot_mesh
-
 
 def plot_existing_mesh(mesh_file: str, plot_filename: str = None, split: bool = False):
     """Plot an existing mesh from file."""
-    with open(mesh_file, "rb") as f:
-        mesh_result = pickle.load(f)
+    from cgfoil.utils.meshio import load_mesh
+    from cgfoil.utils.plot import plot_mesh
+
+    mesh_result = load_mesh(mesh_file)
     plot_mesh(mesh_result, plot_filename, split)
@@ -1,13 +1,23 @@
 """Run command functionality."""
 
-from cgfoil.core.main import run_cgfoil
-from cgfoil.models import Skin, Thickness, AirfoilMesh
+from cgfoil.utils.profile import profile_to
 
 
 def run_defaults(
-    plot: bool = False, vtk: str = None, file: str = "naca0018.dat", split: bool = False
+    plot: bool = False,
+    vtk: str = None,
+    file: str = "naca0018.dat",
+    split: bool = False,
+    cache_dir: str = None,
+    no_cache: bool = False,
+    profile: str = None,
 ):
-    """Run meshing with default skins and no webs."""
+    """Run meshing with default skins and no webs, with profile the stage
+    times and counters are written to that JSON file."""
+    from cgfoil.core.cache import resolve_cache_dir
+    from cgfoil.core.main import run_cgfoil
+    from cgfoil.models import Skin, Thickness, AirfoilMesh
+
     skins = {
         "skin": Skin(
             thickness=Thickness(type="constant", value=0.005), material=1, sort_index=1
@@ -22,4 +32,5 @@ def run_defaults(
         vtk=vtk,
         split_view=split,
     )
-    run_cgfoil(mesh)
+    with profile_to(profile):
+        run_cgfoil(mesh, resolve_cache_dir(cache_dir, no_cache))
@@ -1,20 +1,28 @@
 """Summary command functionality."""
 
-import pickle
-import pandas as pd
 from cgfoil.utils.logger import logger
+from cgfoil.utils.profile import stage
 
 
+@stage("summary")
 def summarize_mesh(mesh_file: str, output: str = None):
     """Summarize areas and masses from mesh file."""
-    with open(mesh_file, "rb") as f:
-        mesh_result = pickle.load(f)
+    import pandas as pd
+    from cgfoil.utils.meshio import MeshFile, is_mesh_file, load_mesh
+
+    if is_mesh_file(mesh_file):
+        # Areas and materials are in the header, no arrays are read
+        mesh = MeshFile(mesh_file)
+        areas, materials = mesh.areas, mesh.meta["materials"]
+    else:
+        mesh_result = load_mesh(mesh_file)
+        areas, materials = mesh_result.areas, mesh_result.materials
     rows = []
     total_mass = 0.0
-    for mat_id, area in sorted(mesh_result.areas.items()):
-        if mesh_result.materials and mat_id < len(mesh_result.materials):
-            name = mesh_result.materials[mat_id].get("name", "N/A")
-            rho = mesh_result.materials[mat_id]["rho"]
+    for mat_id, area in sorted(areas.items()):
+        if materials and mat_id < len(materials):
+            name = materials[mat_id].get("name", "N/A")
+            rho = materials[mat_id]["rho"]
             mass = area * rho
             total_mass += mass
         else:
@@ -28,7 +36,7 @@ def summarize_mesh(mesh_file: str, output: str = None):
                 "Mass/m": mass,
             }
         )
-    if mesh_result.materials:
+    if materials:
         rows.append(
             {
                 "Material ID": "Total",
@@ -1,10 +1,13 @@
 """ANBA data building utilities."""
 
 import math
+from cgfoil.models import MeshResult
 
 
 def build_anba_data(mesh_result, matdb=None):
     """Build ANBA data dict from mesh_result."""
+    if isinstance(mesh_result, MeshResult):
+        mesh_result = mesh_result.as_lists()
     points = [[p[0], p[1]] for p in mesh_result.vertices]  # Remove z
     cells = [face[1:] for face in mesh_result.faces]  # Remove the 3
     degree = 2
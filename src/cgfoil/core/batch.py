@@ -0,0 +1,139 @@
+"""Parallel meshing of many airfoil definitions."""
+
+import glob
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import yaml
+from cgfoil.core.cache import cached_generate_mesh
+from cgfoil.core.main import plot_mesh
+from cgfoil.models import AirfoilMesh, BatchError, BatchReport
+from cgfoil.utils.logger import logger
+
+
+def collect_yaml_files(paths):
+    """Expand YAML files, directories and glob patterns into a list of files.
+
+    Directories contribute their *.yaml and *.yml files, each group is sorted
+    and duplicates are dropped."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted(
+                glob.glob(os.path.join(path, "*.yaml"))
+                + glob.glob(os.path.join(path, "*.yml"))
+            )
+        elif glob.has_magic(path):
+            matches = sorted(glob.glob(path, recursive=True))
+        else:
+            matches = [path]
+        files.extend(m for m in matches if m not in files)
+    return files
+
+
+def load_mesh_definition(yaml_file):
+    """Load an AirfoilMesh from a YAML file."""
+    with open(yaml_file, "r") as f:
+        data = yaml.safe_load(f)
+    return AirfoilMesh(**data)
+
+
+def _mesh_task(name, mesh, cache_dir=None, plot_dir=None):
+    """Mesh one definition, mesh may be an AirfoilMesh or a YAML file.
+
+    With plot_dir the mesh is also plotted to <plot_dir>/<name>.png. Errors
+    are returned rather than raised so they reach the parent intact."""
+    start = time.perf_counter()
+    try:
+        if not isinstance(mesh, AirfoilMesh):
+            mesh = load_mesh_definition(mesh)
+        mesh_result = cached_generate_mesh(mesh, cache_dir)
+        if plot_dir is not None:
+            plot_file = os.path.join(plot_dir, f"{name}.png")
+            plot_mesh(mesh_result, plot_file, mesh.split_view)
+        return name, mesh_result, None, time.perf_counter() - start
+    except Exception as e:
+        error = BatchError(
+            name=name,
+            error_type=type(e).__name__,
+            message=str(e),
+            traceback=traceback.format_exc(),
+        )
+        return name, None, error, time.perf_counter() - start
+
+
+def _named_tasks(meshes):
+    """Pair every definition with a name, keys of a mapping or else the path
+    of a YAML file or the position in the sequence."""
+    if isinstance(meshes, dict):
+        return list(meshes.items())
+    return [
+        (mesh if isinstance(mesh, str) else str(idx), mesh)
+        for idx, mesh in enumerate(meshes)
+    ]
+
+
+def generate_meshes(meshes, jobs=None, report=None, cache_dir=None, plot_dir=None):
+    """Mesh many definitions on a process pool, yielding (name, MeshResult)
+    pairs in completion order.
+
+    meshes is a mapping of names to definitions or a sequence of definitions,
+    each an AirfoilMesh or the path of a YAML file. jobs sets the number of
+    worker processes, default one per CPU, with jobs=1 everything runs in
+    this process. Failed tasks are not yielded but recorded in report, which
+    is also the return value of the generator. With cache_dir set results
+    are looked up in and added to the mesh cache there. With plot_dir set
+    every mesh is plotted to <plot_dir>/<name>.png by the worker meshing it."""
+    tasks = _named_tasks(meshes)
+    if report is None:
+        report = BatchReport()
+    report.n_tasks += len(tasks)
+    jobs = min(jobs or os.cpu_count() or 1, max(len(tasks), 1))
+
+    def record(name, result, error, elapsed):
+        report.elapsed[name] = elapsed
+        if error is not None:
+            logger.error(f"Meshing {name} failed: {error.error_type}: {error.message}")
+            report.errors.append(error)
+            return False
+        report.succeeded.append(name)
+        logger.info(f"Meshed {name} in {elapsed:.2f} s")
+        return True
+
+    if jobs == 1:
+        for name, mesh in tasks:
+            outcome = _mesh_task(name, mesh, cache_dir, plot_dir)
+            if record(*outcome):
+                yield outcome[0], outcome[1]
+        return report
+
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    futures = {}
+    try:
+        futures = {
+            pool.submit(_mesh_task, name, mesh, cache_dir, plot_dir): name
+            for name, mesh in tasks
+        }
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except Exception as e:
+                # The task never ran or its result could not be returned
+                name = futures[future]
+                error = BatchError(
+                    name=name,
+                    error_type=type(e).__name__,
+                    message=str(e),
+                    traceback=traceback.format_exc(),
+                )
+                outcome = (name, None, error, 0.0)
+            if record(*outcome):
+                yield outcome[0], outcome[1]
+    finally:
+        # Drop pending tasks when the consumer stops early, shutdown's
+        # cancel_futures needs Python 3.9
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=True)
+    return report
@@ -0,0 +1,183 @@
+"""Content-addressed on-disk cache of mesh results.
+
+Results are stored as binary mesh files named by a hash of the normalized
+AirfoilMesh input and the cgfoil version. Hits refresh the file time and the
+least recently used files are evicted once the cache exceeds its size."""
+
+import hashlib
+import json
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from typing import Optional
+import numpy as np
+from cgfoil.core.main import generate_mesh
+from cgfoil.models import AirfoilMesh, MeshResult
+from cgfoil.utils.geometry import as_polyline
+from cgfoil.utils.io import read_airfoil_file
+from cgfoil.utils.logger import logger
+from cgfoil.utils.meshio import VERSION, MeshFile, save_mesh
+from cgfoil.utils.profile import count, stage
+
+CACHE_DIR_ENV = "CGFOIL_CACHE_DIR"
+DEFAULT_MAX_BYTES = 1 << 30
+_SUFFIX = ".cgfmesh"
+# Fields that only control output, not the mesh
+_OUTPUT_FIELDS = {"plot", "vtk", "split_view", "plot_filename"}
+
+
+def cgfoil_version() -> str:
+    try:
+        return version("cgfoil")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _points(value) -> np.ndarray:
+    """Points of an airfoil or web input, files are read so that the key
+    follows their content rather than their name."""
+    if isinstance(value, str):
+        points = read_airfoil_file(value)
+    else:
+        points = as_polyline(value)
+    return np.ascontiguousarray(points, dtype="<f8")
+
+
+def mesh_key(mesh: AirfoilMesh) -> str:
+    """Hash of everything generate_mesh reads from mesh.
+
+    Covers the airfoil and web geometry, thickness definitions, materials,
+    scale_factor, n_elem and labelling, the cgfoil version and the mesh file
+    version; plot and VTK output options are left out."""
+    definition = mesh.model_dump(
+        mode="json",
+        exclude={
+            "airfoil_input": True,
+            "webs": {"__all__": {"coord_input"}},
+            **{name: True for name in _OUTPUT_FIELDS},
+        },
+    )
+    h = hashlib.blake2b(digest_size=20)
+    header = {"cgfoil": cgfoil_version(), "format": VERSION, "mesh": definition}
+    h.update(json.dumps(header, sort_keys=True).encode("utf-8"))
+    arrays = [("airfoil_input", mesh.airfoil_input)]
+    arrays += [(f"web:{name}", web.coord_input) for name, web in mesh.webs.items()]
+    for name, value in arrays:
+        h.update(name.encode("utf-8"))
+        if value is not None and len(value) > 0:
+            points = _points(value)
+            h.update(str(points.shape).encode("utf-8"))
+            h.update(points.tobytes())
+    return h.hexdigest()
+
+
+class MeshCache:
+    """A directory of cached mesh results, bounded to max_bytes."""
+
+    def __init__(self, directory, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[MeshResult]:
+        """Return the cached result for key, or None on a miss."""
+        path = self.path(key)
+        try:
+            mesh_result = MeshFile(path).to_result()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return mesh_result
+
+    def put(self, key: str, mesh_result: MeshResult):
+        """Store a result under key and evict old entries beyond max_bytes."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            save_mesh(mesh_result, tmp_path)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        """(mtime, size, path) of the cached files, oldest first."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def resolve_cache_dir(cache_dir: Optional[str] = None, no_cache: bool = False):
+    """The cache directory to use, cache_dir or else $CGFOIL_CACHE_DIR.
+
+    Returns None when caching is disabled."""
+    if no_cache:
+        return None
+    return cache_dir or os.environ.get(CACHE_DIR_ENV) or None
+
+
+def cached_generate_mesh(
+    mesh: AirfoilMesh,
+    cache_dir: Optional[str] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> MeshResult:
+    """generate_mesh with results cached in cache_dir, without a cache_dir
+    this is generate_mesh."""
+    if cache_dir is None:
+        return generate_mesh(mesh)
+    cache = MeshCache(cache_dir, max_bytes)
+    with stage("cache_lookup"):
+        key = mesh_key(mesh)
+        mesh_result = cache.get(key)
+    if mesh_result is not None:
+        count("cache_hits")
+        logger.info(f"Mesh cache hit {key[:12]}")
+        return mesh_result
+    count("cache_misses")
+    mesh_result = generate_mesh(mesh)
+    with stage("cache_store"):
+        cache.put(key, mesh_result)
+    logger.info(f"Mesh cached as {key[:12]}")
+    return mesh_result
@@ -1,117 +1,60 @@
 """Main execution logic for cgfoil."""
 
-import math
+import copy
 import numpy as np
-from typing import Optional
-from CGAL.CGAL_Kernel import Point_2
+from typing import Optional, Union
 from CGAL.CGAL_Mesh_2 import Mesh_2_Constrained_Delaunay_triangulation_2
-from cgfoil.core.mesh import create_line_mesh
-from cgfoil.core.normals import compute_face_normals
-from cgfoil.core.offset import offset_airfoil
+from cgfoil.core.normals import classify_faces
+from cgfoil.core.triangulation import extract_triangulation, insert_constraints
+from cgfoil.core.plan import MeshPlan, compile_mesh
+from cgfoil.core.offset import offset_airfoil, offset_skin_stack
+from cgfoil.core.thickness import evaluate_thickness
 from cgfoil.core.trim import (
     adjust_endpoints,
     trim_line,
     trim_self_intersecting_curve,
 )
 from cgfoil.models import AirfoilMesh, MeshResult
-from cgfoil.utils.io import load_airfoil, save_mesh_to_vtk
+from cgfoil.utils.geometry import outline_coordinates, prepare_polygon
+from cgfoil.utils.io import save_mesh_to_vtk
 from cgfoil.utils.logger import logger
-from cgfoil.utils.plot import plot_triangulation
-from cgfoil.utils.summary import compute_cross_sectional_areas
+from cgfoil.utils.profile import count, current_profile, stage
+from cgfoil.utils.summary import face_areas, sum_areas_by_material
 
 
-def generate_mesh(mesh: AirfoilMesh) -> MeshResult:
-    skins = mesh.skins
-    web_definition = mesh.webs
-    airfoil_input = mesh.airfoil_input
-    n_elem = mesh.n_elem
-    materials = mesh.materials or []
-    scale_factor = mesh.scale_factor
+def generate_mesh(mesh: Union[AirfoilMesh, MeshPlan]) -> MeshResult:
+    """Mesh an AirfoilMesh, or a plan compiled from one by compile_mesh.
 
-    # Collect used material names for db check
-    used_names = set()
-    for s in skins.values():
-        if isinstance(s.material, str):
-            used_names.add(s.material)
-    for web in web_definition.values():
-        for ply in web.plies:
-            if isinstance(ply.material, str):
-                used_names.add(ply.material)
-
-    # If materials db is defined, check all used are present
-    if materials:
-        name_to_id = {mat["name"]: idx for idx, mat in enumerate(materials)}
-        missing = []
-        for name in used_names:
-            if name not in name_to_id:
-                missing.append(f"'{name}'")
-        if missing:
-            raise ValueError(
-                "The following materials are not defined in the materials "
-                f"database: {', '.join(missing)}"
-            )
+    The input is not modified, so it can be meshed again. Inside a
+    profiling block the stage times and counters are attached to the result
+    as its profile."""
+    if isinstance(mesh, MeshPlan):
+        plan = mesh
     else:
-        name_to_id = {}
-
-    # Assign unique material IDs
-    sorted_skins = sorted(skins.values(), key=lambda s: s.sort_index)
-    for s in sorted_skins:
-        if isinstance(s.material, str):
-            s.material = name_to_id[s.material]
-        # else assume int
-    for web in web_definition.values():
-        for ply in web.plies:
-            if isinstance(ply.material, str):
-                ply.material = name_to_id[ply.material]
-            # else assume int
-
-    logger.info(f"skins materials: {[s.material for s in sorted_skins]}")
-
-    # Load airfoil points (outer)
-    outer_points = load_airfoil(airfoil_input, n_elem)
-
-    # Apply scale factor to airfoil points
-    if scale_factor != 1.0:
-        outer_points = [
-            Point_2(p.x() * scale_factor, p.y() * scale_factor) for p in outer_points
-        ]
-
-    # Apply scale factor to web points
-    for web in web_definition.values():
-        if web.points:
-            web.points = tuple(
-                (p[0] * scale_factor, p[1] * scale_factor) for p in web.points
-            )
+        with stage("compile"):
+            plan = compile_mesh(mesh)
+    outer_points = plan.outer_points
+    count("outer_points", len(outer_points))
+    skin_material_ids = [s.material for s in plan.skins]
 
-    # Compute coordinates: x, ta (absolute arc length), tr (relative arc length)
-    x = [p.x() for p in outer_points]
-    ta = [0.0]
-    for i in range(1, len(outer_points)):
-        dx = outer_points[i].x() - outer_points[i - 1].x()
-        dy = outer_points[i].y() - outer_points[i - 1].y()
-        dist = math.sqrt(dx**2 + dy**2)
-        ta.append(ta[-1] + dist)
-    total_length = ta[-1]
-    tr = [t / total_length for t in ta]
+    logger.info(f"skins materials: {skin_material_ids}")
 
-    # Compute xr: relative x-coordinate from 0 to 1
-    x_min = min(x)
-    x_max = max(x)
-    xr = [(xi - x_min) / (x_max - x_min) for xi in x]
-
-    # Ply thicknesses for airfoil
+    # Ply thicknesses for airfoil, from x, ta (absolute arc length),
+    # tr (relative arc length) and xr (relative x-coordinate)
     ply_thicknesses = []
-    y_outer = [p.y() for p in outer_points]
-    coords_skin = {"x": x, "y": y_outer, "ta": ta, "tr": tr, "xr": xr}
-    for s in sorted_skins:
-        thickness_result = s.thickness.compute(coords_skin)
-        ply_thicknesses.append(thickness_result)
-    inner_list = []
-    current = outer_points
-    for thickness in ply_thicknesses:
-        current = offset_airfoil(current, thickness)
-        inner_points = trim_self_intersecting_curve(current)
-        inner_list.append(inner_points)
+    coords_skin = outline_coordinates(outer_points)
+    with stage("thickness"):
+        for s in plan.skins:
+            thickness_result = evaluate_thickness(s.thickness, coords_skin)
+            ply_thicknesses.append(thickness_result)
+    with stage("offset"):
+        skin_loops, outer_normals, outer_tangents = offset_skin_stack(
+            outer_points, ply_thicknesses
+        )
+    with stage("trim"):
+        inner_list = [trim_self_intersecting_curve(loop) for loop in skin_loops]
+    count("skin_loops", len(inner_list))
+    count("skin_loop_points", sum(len(loop) for loop in inner_list))
 
     # Calculate protrusion distance from last ply thickness
     if ply_thicknesses:
@@ -125,56 +68,46 @@ def generate_mesh(mesh: AirfoilMesh) -> MeshResult:
     else:
         protrusion_distance = 1e-3
 
+    # Webs are trimmed against the innermost loop, prepared once for all plies
+    trim_loop = prepare_polygon(inner_list[-1] if inner_list else outer_points)
+
     # Create line plies for each web
     line_ply_list = []
     web_material_ids = []
     ply_normals = []
     untrimmed_lines = []
-    web_names = list(web_definition.keys())
+    web_names = [web.name for web in plan.webs]
     web_ply_thicknesses = []
-    for web_name, web in web_definition.items():
-        if web.coord_input:
-            untrimmed_base_line = load_airfoil(web.coord_input, web.n_elem)
-        elif web.points:
-            if len(web.points) == 2:
-                p1_coords, p2_coords = web.points
-                p1 = Point_2(*p1_coords)
-                p2 = Point_2(*p2_coords)
-                untrimmed_base_line = create_line_mesh(p1, p2, web.n_elem or 20)
-            else:
-                untrimmed_base_line = [Point_2(*p) for p in web.points]
-        else:
-            raise ValueError(f"Web {web_name} must have either points or coord_input")
-        untrimmed_lines.append(untrimmed_base_line)
-        base_line = trim_line(
-            untrimmed_base_line, inner_list[-1] if inner_list else outer_points
-        )
-        base_line = adjust_endpoints(base_line, protrusion_distance)
-        current_line = base_line
-        current_untrimmed = untrimmed_base_line
-        normal_ref = web.normal_ref
-        for ply in web.plies:
-            x_web = [p.x() for p in untrimmed_base_line]
-            y_web = [p.y() for p in untrimmed_base_line]
+    with stage("webs"):
+        for web in plan.webs:
+            untrimmed_base_line = web.base_line
+            untrimmed_lines.append(untrimmed_base_line)
+            base_line = trim_line(untrimmed_base_line, trim_loop)
+            base_line = adjust_endpoints(base_line, protrusion_distance)
+            current_line = base_line
+            current_untrimmed = untrimmed_base_line
+            normal_ref = web.normal_ref
+            # Ply thicknesses are evaluated on the untrimmed base line
+            x_web = untrimmed_base_line[:, 0]
+            y_web = untrimmed_base_line[:, 1]
             coords_web = {"x": x_web, "y": y_web, "ta": [], "tr": [], "xr": []}
-            thickness_list = ply.thickness.compute(coords_web)
-            web_ply_thicknesses.append(thickness_list)
-            untrimmed_offset_line = offset_airfoil(
-                current_untrimmed, thickness_list, normal_ref
-            )
-            offset_line = trim_line(
-                untrimmed_offset_line, inner_list[-1] if inner_list else outer_points
-            )
-            offset_line = adjust_endpoints(offset_line, protrusion_distance)
-            ply_points = current_line + offset_line[::-1]
-            line_ply_list.append(ply_points)
-            web_material_ids.append(ply.material)
-            ply_normals.append(normal_ref if normal_ref else [0, 0])
-            current_line = offset_line
-            current_untrimmed = untrimmed_offset_line
-
-    # Skin material ids
-    skin_material_ids = [s.material for s in sorted_skins]
+            for ply in web.plies:
+                with stage("thickness"):
+                    thickness_list = evaluate_thickness(ply.thickness, coords_web)
+                web_ply_thicknesses.append(thickness_list)
+                untrimmed_offset_line = offset_airfoil(
+                    current_untrimmed, thickness_list, normal_ref
+                )
+                offset_line = trim_line(untrimmed_offset_line, trim_loop)
+                offset_line = adjust_endpoints(offset_line, protrusion_distance)
+                ply_points = np.vstack((current_line, offset_line[::-1]))
+                line_ply_list.append(ply_points)
+                web_material_ids.append(ply.material)
+                ply_normals.append(list(normal_ref) if normal_ref else [0, 0])
+                current_line = offset_line
+                current_untrimmed = untrimmed_offset_line
+    count("web_plies", len(line_ply_list))
+    count("web_ply_points", sum(len(ply) for ply in line_ply_list))
 
     logger.info(f"skin_material_ids: {skin_material_ids}")
     logger.info(f"web_material_ids: {web_material_ids}")
@@ -182,117 +115,72 @@ def generate_mesh(mesh: AirfoilMesh) -> MeshResult:
     # Create constrained Delaunay triangulation
     cdt = Mesh_2_Constrained_Delaunay_triangulation_2()
 
-    # Insert outer boundary as constraints
-    for i in range(len(outer_points)):
-        cdt.insert_constraint(
-            outer_points[i], outer_points[(i + 1) % len(outer_points)]
+    # Insert outer boundary, inner boundaries and line plies as constraints
+    with stage("cdt_insert"):
+        n_points, n_constraints = insert_constraints(
+            cdt, [outer_points, *inner_list, *line_ply_list]
         )
-
-    # Insert inner boundaries as constraints
-    for inner_points in inner_list:
-        for i in range(len(inner_points)):
-            cdt.insert_constraint(
-                inner_points[i], inner_points[(i + 1) % len(inner_points)]
-            )
-
-    # Insert line plies as constraints
-    for ply_points in line_ply_list:
-        for i in range(len(ply_points)):
-            cdt.insert_constraint(ply_points[i], ply_points[(i + 1) % len(ply_points)])
-
-    # Compute normals for outer points (outward)
-    n = len(outer_points)
-    outer_normals = []
-    outer_tangents = []
-    for i in range(n):
-        prev = outer_points[(i - 1) % n]
-        outer_points[i]
-        next_p = outer_points[(i + 1) % n]
-        tx = (next_p.x() - prev.x()) / 2
-        ty = (next_p.y() - prev.y()) / 2
-        t_len = math.sqrt(tx**2 + ty**2)
-        if t_len > 0:
-            tx /= t_len
-            ty /= t_len
-        nx = -ty
-        ny = tx
-        outer_normals.append((nx, ny))
-        outer_tangents.append((tx, ty))
-
-    # Collect vertices and faces
-    vertices = []
-    vertex_map = {}
-    idx = 0
-    for v in cdt.finite_vertices():
-        vertex_map[v] = idx
-        vertices.append([v.point().x(), v.point().y(), 0.0])
-        idx += 1
-    faces = []
-    for face in cdt.finite_faces():
-        material_id = -1  # Will compute below
-        if material_id != -1:
-            v0 = vertex_map[face.vertex(0)]
-            v1 = vertex_map[face.vertex(1)]
-            v2 = vertex_map[face.vertex(2)]
-            faces.append([3, v0, v1, v2])
+    count("cdt_points_inserted", n_points)
+    count("cdt_constraints", n_constraints)
+    logger.info(f"Inserted {n_points} points and {n_constraints} constraints")
+
+    # Extract vertices, faces and constrained edges in a single pass
+    with stage("cdt_extract"):
+        vertices, faces, constrained = extract_triangulation(
+            cdt, constrained_edges=plan.labelling == "region"
+        )
+    count("cdt_vertices", len(vertices))
+    count("cdt_faces", len(faces))
+    logger.info(f"Extracted {len(vertices)} vertices and {len(faces)} faces")
 
     # Compute face normals and material IDs
-    face_normals, face_material_ids, face_inplanes = compute_face_normals(
-        cdt,
-        outer_points,
-        inner_list,
-        line_ply_list,
-        web_material_ids,
-        skin_material_ids,
-        outer_normals,
-        ply_normals,
-        outer_tangents,
-    )
-
-    # Collect faces with material_id != -1 and filter the lists
-    faces = []
-    filtered_face_normals = []
-    filtered_face_material_ids = []
-    filtered_face_inplanes = []
-    idx = 0
-    for face in cdt.finite_faces():
-        material_id = face_material_ids[idx]
-        if material_id != -1:
-            v0 = vertex_map[face.vertex(0)]
-            v1 = vertex_map[face.vertex(1)]
-            v2 = vertex_map[face.vertex(2)]
-            faces.append([3, v0, v1, v2])
-            filtered_face_normals.append(face_normals[idx])
-            filtered_face_material_ids.append(material_id)
-            filtered_face_inplanes.append(face_inplanes[idx])
-        idx += 1
-
-    # Compute cross-sectional areas
-    areas = compute_cross_sectional_areas(cdt, face_material_ids)
+    with stage("classify"):
+        face_normals, face_material_ids, face_inplanes = classify_faces(
+            vertices,
+            faces,
+            outer_points,
+            inner_list,
+            line_ply_list,
+            web_material_ids,
+            skin_material_ids,
+            outer_normals,
+            ply_normals,
+            outer_tangents,
+            labelling=plan.labelling,
+            constrained=constrained,
+        )
 
-    # Convert to serializable lists
-    outer_points_list = [(p.x(), p.y()) for p in outer_points]
-    inner_list_list = [[(p.x(), p.y()) for p in inner] for inner in inner_list]
-    line_ply_list_list = [[(p.x(), p.y()) for p in ply] for ply in line_ply_list]
-    untrimmed_lines_list = [[(p.x(), p.y()) for p in line] for line in untrimmed_lines]
+    # Keep faces with material_id != -1 and compute cross-sectional areas
+    keep = face_material_ids != -1
+    faces = faces[keep]
+    face_normals = face_normals[keep]
+    face_material_ids = face_material_ids[keep]
+    face_inplanes = face_inplanes[keep]
+    with stage("areas"):
+        areas_per_face = face_areas(vertices, faces)
+        areas = sum_areas_by_material(areas_per_face, face_material_ids)
+    count("faces", len(faces))
+    profile = current_profile()
 
     return MeshResult(
         vertices=vertices,
         faces=faces,
-        outer_points=outer_points_list,
-        inner_list=inner_list_list,
-        line_ply_list=line_ply_list_list,
-        untrimmed_lines=untrimmed_lines_list,
+        outer_points=outer_points,
+        inner_list=inner_list,
+        line_ply_list=line_ply_list,
+        untrimmed_lines=untrimmed_lines,
         web_material_ids=web_material_ids,
         skin_material_ids=skin_material_ids,
         web_names=web_names,
-        face_normals=filtered_face_normals,
-        face_material_ids=filtered_face_material_ids,
-        face_inplanes=filtered_face_inplanes,
+        face_normals=face_normals,
+        face_material_ids=face_material_ids,
+        face_inplanes=face_inplanes,
+        face_areas=areas_per_face,
         areas=areas,
-        materials=materials,
+        materials=copy.deepcopy(list(plan.materials)),
         skin_ply_thicknesses=ply_thicknesses,
         web_ply_thicknesses=web_ply_thicknesses,
+        profile=profile.as_dict() if profile is not None else None,
     )
 
 
@@ -301,35 +189,16 @@ def plot_mesh(
     plot_filename: Optional[str] = None,
     split_view: bool = False,
 ):
-    # Convert back to Point_2 for plotting
-    from CGAL.CGAL_Kernel import Point_2
+    """Plot a mesh result, see cgfoil.utils.plot.plot_mesh."""
+    from cgfoil.utils.plot import plot_mesh
+
+    plot_mesh(mesh_result, plot_filename, split_view)
 
-    outer_points = [Point_2(*p) for p in mesh_result.outer_points]
-    inner_list = [[Point_2(*p) for p in inner] for inner in mesh_result.inner_list]
-    line_ply_list = [[Point_2(*p) for p in ply] for ply in mesh_result.line_ply_list]
-    untrimmed_lines = [
-        [Point_2(*p) for p in line] for line in mesh_result.untrimmed_lines
-    ]
-    plot_triangulation(
-        mesh_result.vertices,
-        mesh_result.faces,
-        outer_points,
-        inner_list,
-        line_ply_list,
-        untrimmed_lines,
-        mesh_result.web_material_ids,
-        mesh_result.skin_material_ids,
-        mesh_result.web_names,
-        mesh_result.face_normals,
-        mesh_result.face_material_ids,
-        mesh_result.face_inplanes,
-        split_view,
-        plot_filename,
-    )
 
+def run_cgfoil(mesh: AirfoilMesh, cache_dir: Optional[str] = None):
+    from cgfoil.core.cache import cached_generate_mesh
 
-def run_cgfoil(mesh: AirfoilMesh):
-    mesh_result = generate_mesh(mesh)
+    mesh_result = cached_generate_mesh(mesh, cache_dir)
     logger.info(f"Cross-sectional areas: {mesh_result.areas}")
 
     if mesh.vtk:
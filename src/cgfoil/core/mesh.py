@@ -1,15 +1,17 @@
 """Meshing utilities."""
 
-from CGAL.CGAL_Kernel import Point_2
+import numpy as np
+from cgfoil.utils.geometry import as_polyline
 
 
 def create_line_mesh(p1, p2, n_elements):
-    """Create points for a line mesh with n_elements between p1 and p2."""
-    points = [p1]
-    for i in range(1, n_elements):
-        t = i / n_elements
-        x = p1.x() + t * (p2.x() - p1.x())
-        y = p1.y() + t * (p2.y() - p1.y())
-        points.append(Point_2(x, y))
-    points.append(p2)
+    """Create an (n_elements + 1, 2) array of points for a line mesh between
+    p1 and p2."""
+    (x1, y1), (x2, y2) = as_polyline([p1, p2])
+    t = np.arange(1, n_elements) / n_elements
+    points = np.empty((n_elements + 1, 2))
+    points[0] = (x1, y1)
+    points[1:-1, 0] = x1 + t * (x2 - x1)
+    points[1:-1, 1] = y1 + t * (y2 - y1)
+    points[-1] = (x2, y2)
     return points
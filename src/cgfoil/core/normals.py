@@ -1,6 +1,14 @@
 """Normal computation utilities."""
 
-from cgfoil.utils.geometry import point_in_polygon
+import numpy as np
+from cgfoil.utils.geometry import (
+    as_polyline,
+    point_in_polygon,
+    points_in_polygon,
+    prepare_polygon,
+)
+from cgfoil.core.regions import face_adjacency, label_regions, region_seeds
+from cgfoil.core.triangulation import extract_triangulation
 
 
 def get_material_id(
@@ -62,8 +70,73 @@ def get_material_id(
     return material_id, is_skin, layer_index
 
 
-def compute_face_normals(
-    cdt,
+def get_material_ids(
+    centroids,
+    outer_points,
+    inner_list,
+    line_ply_list,
+    web_material_ids,
+    skin_material_ids,
+):
+    """Batched get_material_id for an (n, 2) array of centroids.
+
+    Every polygon is prepared once and tested against all centroids, returns
+    material id, is_skin and layer index arrays."""
+    centroids = as_polyline(centroids)
+    n_points = len(centroids)
+    material_ids = np.full(n_points, -1, dtype=np.int64)
+    is_skin = np.zeros(n_points, dtype=bool)
+    layer_index = np.full(n_points, -1, dtype=np.int64)
+    if n_points == 0:
+        return material_ids, is_skin, layer_index
+
+    in_outer = points_in_polygon(centroids, outer_points)
+    inside = [
+        points_in_polygon(centroids, prepare_polygon(inner)) for inner in inner_list
+    ]
+
+    # Skin layer i holds points inside loop i - 1 but outside loop i, the
+    # first matching layer wins as in the sequential search
+    unassigned = in_outer.copy()
+    if inside:
+        unassigned &= ~inside[-1]
+    for i in range(len(inner_list)):
+        if i == 0:
+            hit = unassigned & ~inside[0]
+        else:
+            hit = unassigned & inside[i - 1] & ~inside[i]
+        if skin_material_ids and i < len(skin_material_ids):
+            material_ids[hit] = skin_material_ids[i]
+            is_skin[hit] = True
+            layer_index[hit] = i
+        elif not skin_material_ids and i == 0:
+            material_ids[hit] = 2  # Fixed material ID if no skins
+            is_skin[hit] = True
+            layer_index[hit] = i
+        unassigned &= ~hit
+    if not inner_list:
+        if skin_material_ids:
+            material_ids[unassigned] = skin_material_ids[0]
+        else:
+            material_ids[unassigned] = 2
+        is_skin[unassigned] = True
+        layer_index[unassigned] = 0
+
+    unassigned = in_outer & (material_ids == -1)
+    for idx_ply, ply in enumerate(line_ply_list):
+        if not unassigned.any():
+            break
+        hit = unassigned.copy()
+        hit[unassigned] = points_in_polygon(centroids[unassigned], ply)
+        material_ids[hit] = web_material_ids[idx_ply]
+        layer_index[hit] = idx_ply
+        unassigned &= ~hit
+    return material_ids, is_skin, layer_index
+
+
+def classify_faces(
+    vertices,
+    faces,
     outer_points,
     inner_list,
     line_ply_list,
@@ -72,46 +145,110 @@ def compute_face_normals(
     outer_normals,
     ply_normals,
     outer_tangents,
+    labelling="centroid",
+    constrained=None,
+    outer_tree=None,
 ):
-    """Compute normals, inplane vectors, and material IDs for each finite face
-    in the triangulation."""
-    face_normals = []
-    face_inplanes = []
-    face_material_ids = []
-    n = len(outer_points)
-    for face in cdt.finite_faces():
-        p0 = face.vertex(0).point()
-        p1 = face.vertex(1).point()
-        p2 = face.vertex(2).point()
-        cx = (p0.x() + p1.x() + p2.x()) / 3.0
-        cy = (p0.y() + p1.y() + p2.y()) / 3.0
-        centroid = type(outer_points[0])(cx, cy)  # Assuming Point_2
-        material_id, is_skin, layer_index = get_material_id(
-            centroid,
+    """Compute normals, inplane vectors, and material IDs for an (M, 3) face
+    array indexing an (N, 2) vertex array, as returned by extract_triangulation.
+
+    With labelling="centroid" every face centroid is classified, with
+    labelling="region" the faces are flood filled into regions bounded by
+    the constrained edges and only one seed face per region is classified.
+
+    Skin faces take the normal and tangent of the closest outer point, found
+    with a KD-tree on outer_points; pass outer_tree to reuse a built tree.
+    Returns (M, 2) normal and inplane arrays and the material id array."""
+    if labelling not in ("centroid", "region"):
+        raise ValueError(f"Unknown labelling mode: {labelling}")
+    corners = np.asarray(vertices, dtype=np.float64)[faces]
+    centroids = (corners[:, 0] + corners[:, 1] + corners[:, 2]) / 3.0
+    if labelling == "region":
+        if constrained is None:
+            raise ValueError("Region labelling needs the constrained edge flags")
+        _, labels = label_regions(len(faces), face_adjacency(faces, constrained))
+        edge1 = corners[:, 1] - corners[:, 0]
+        edge2 = corners[:, 2] - corners[:, 0]
+        twice_areas = np.abs(edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0])
+        seeds = region_seeds(labels, twice_areas)
+        material_ids, is_skin, layer_index = get_material_ids(
+            centroids[seeds],
             outer_points,
             inner_list,
             line_ply_list,
             web_material_ids,
             skin_material_ids,
         )
-        normal_x, normal_y = 0, 0
-        inplane_x, inplane_y = 0, 0
-        if is_skin:
-            # Find closest outer point by 2D distance
-            closest_i = min(
-                range(n),
-                key=lambda j: (outer_points[j].x() - cx) ** 2
-                + (outer_points[j].y() - cy) ** 2,
-            )
-            normal_x, normal_y = outer_normals[closest_i]
-            inplane_x, inplane_y = outer_tangents[closest_i]
-        elif material_id in web_material_ids:
-            normal_x, normal_y = ply_normals[layer_index]
-            inplane_x, inplane_y = (
-                ply_normals[layer_index][1],
-                -ply_normals[layer_index][0],
-            )
-        face_normals.append((normal_x, normal_y))
-        face_inplanes.append((inplane_x, inplane_y))
-        face_material_ids.append(material_id)
-    return face_normals, face_material_ids, face_inplanes
+        material_ids = material_ids[labels]
+        is_skin = is_skin[labels]
+        layer_index = layer_index[labels]
+    else:
+        material_ids, is_skin, layer_index = get_material_ids(
+            centroids,
+            outer_points,
+            inner_list,
+            line_ply_list,
+            web_material_ids,
+            skin_material_ids,
+        )
+    face_normals = np.zeros((len(centroids), 2))
+    face_inplanes = np.zeros((len(centroids), 2))
+    if is_skin.any():
+        if outer_tree is None:
+            from scipy.spatial import cKDTree
+
+            outer_tree = cKDTree(as_polyline(outer_points))
+        _, closest = outer_tree.query(centroids[is_skin])
+        face_normals[is_skin] = np.asarray(outer_normals, dtype=np.float64)[closest]
+        face_inplanes[is_skin] = np.asarray(outer_tangents, dtype=np.float64)[closest]
+    is_web = ~is_skin & np.isin(material_ids, web_material_ids)
+    if is_web.any():
+        normals = np.asarray(ply_normals, dtype=np.float64)[layer_index[is_web]]
+        face_normals[is_web] = normals
+        face_inplanes[is_web] = np.column_stack((normals[:, 1], -normals[:, 0]))
+    return face_normals, material_ids, face_inplanes
+
+
+def compute_face_normals(
+    cdt,
+    outer_points,
+    inner_list,
+    line_ply_list,
+    web_material_ids,
+    skin_material_ids,
+    outer_normals,
+    ply_normals,
+    outer_tangents,
+    labelling="centroid",
+    outer_tree=None,
+):
+    """Compute normals, inplane vectors, and material IDs for each finite face
+    in the triangulation.
+
+    Extracts the triangulation and runs classify_faces, returns lists in
+    finite face order."""
+    if labelling not in ("centroid", "region"):
+        raise ValueError(f"Unknown labelling mode: {labelling}")
+    vertices, faces, constrained = extract_triangulation(
+        cdt, constrained_edges=labelling == "region"
+    )
+    face_normals, material_ids, face_inplanes = classify_faces(
+        vertices,
+        faces,
+        outer_points,
+        inner_list,
+        line_ply_list,
+        web_material_ids,
+        skin_material_ids,
+        outer_normals,
+        ply_normals,
+        outer_tangents,
+        labelling=labelling,
+        constrained=constrained,
+        outer_tree=outer_tree,
+    )
+    return (
+        [tuple(n) for n in face_normals.tolist()],
+        material_ids.tolist(),
+        [tuple(i) for i in face_inplanes.tolist()],
+    )
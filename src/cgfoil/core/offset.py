@@ -1,40 +1,47 @@
 """Offset airfoil functionality."""
 
-import math
-from CGAL.CGAL_Kernel import Point_2
+import numpy as np
+from cgfoil.utils.geometry import as_polyline
+
+
+def loop_frames(points):
+    """Unit tangents and natural (outward) normals of a closed loop from
+    central differences. Returns two (n, 2) arrays."""
+    points = as_polyline(points)
+    tangents = (np.roll(points, -1, axis=0) - np.roll(points, 1, axis=0)) / 2
+    t_len = np.sqrt(tangents[:, 0] ** 2 + tangents[:, 1] ** 2)
+    nonzero = t_len > 0
+    tangents[nonzero] /= t_len[nonzero, None]
+    normals = np.column_stack((-tangents[:, 1], tangents[:, 0]))
+    return normals, tangents
 
 
 def offset_airfoil(points, distances, normal_ref=None):
     """Offset the airfoil by distances along normals (inward),
-    aligned with normal_ref if provided."""
-    if isinstance(distances, (int, float)):
-        distances = [distances] * len(points)
-    n = len(points)
-    offset_points = []
-    for i in range(n):
-        prev = points[(i - 1) % n]
-        curr = points[i]
-        next_p = points[(i + 1) % n]
-        # Tangent vector
-        tx = (next_p.x() - prev.x()) / 2
-        ty = (next_p.y() - prev.y()) / 2
-        # Normalize tangent
-        t_len = math.sqrt(tx**2 + ty**2)
-        if t_len > 0:
-            tx /= t_len
-            ty /= t_len
-        # Natural normal (outward)
-        natural_nx = -ty
-        natural_ny = tx
-        # Adjust based on normal_ref
-        if normal_ref:
-            dot = natural_nx * normal_ref[0] + natural_ny * normal_ref[1]
-            if dot < 0:
-                natural_nx = -natural_nx
-                natural_ny = -natural_ny
-        nx, ny = natural_nx, natural_ny
-        # Offset inward
-        ox = curr.x() + distances[i] * nx
-        oy = curr.y() + distances[i] * ny
-        offset_points.append(Point_2(ox, oy))
-    return offset_points
+    aligned with normal_ref if provided. Returns an (n, 2) array."""
+    points = as_polyline(points)
+    normals, _ = loop_frames(points)
+    # Adjust based on normal_ref
+    if normal_ref:
+        dot = normals[:, 0] * normal_ref[0] + normals[:, 1] * normal_ref[1]
+        normals[dot < 0] *= -1
+    distances = np.asarray(distances, dtype=np.float64).reshape(-1, 1)
+    return points + distances * normals
+
+
+def offset_skin_stack(outer_points, thicknesses):
+    """Offset the outer loop by each skin ply thickness in turn.
+
+    Every ply is offset from the untrimmed loop of the previous one. Returns
+    the list of untrimmed loops, one per ply, and the normals and tangents of
+    the outer loop."""
+    current = as_polyline(outer_points)
+    outer_normals, outer_tangents = loop_frames(current)
+    normals = outer_normals
+    loops = []
+    for thickness in thicknesses:
+        thickness = np.asarray(thickness, dtype=np.float64).reshape(-1, 1)
+        current = current + thickness * normals
+        loops.append(current)
+        normals, _ = loop_frames(current)
+    return loops, outer_normals, outer_tangents
@@ -0,0 +1,130 @@
+"""Compilation of an AirfoilMesh into an immutable meshing plan."""
+
+import copy
+from typing import Dict, List, NamedTuple, Tuple, Union
+import numpy as np
+from cgfoil.core.mesh import create_line_mesh
+from cgfoil.models import AirfoilMesh, ThicknessPlan
+from cgfoil.utils.geometry import as_polyline
+from cgfoil.utils.io import load_airfoil
+from cgfoil.utils.profile import stage
+
+
+class PlyPlan(NamedTuple):
+    """A resolved layer: integer material id and compiled thickness."""
+
+    material: int
+    thickness: ThicknessPlan
+
+
+class WebPlan(NamedTuple):
+    """A resolved web: its untrimmed base line, plies and normal reference."""
+
+    name: str
+    base_line: np.ndarray
+    plies: Tuple[PlyPlan, ...]
+    normal_ref: Tuple[float, ...]
+
+
+class MeshPlan(NamedTuple):
+    """Everything generate_mesh needs from an AirfoilMesh.
+
+    Material names are resolved to ids, the geometry is loaded, resampled
+    and scaled and thicknesses are compiled. Arrays are read-only, so a plan
+    can be meshed any number of times, also from several threads."""
+
+    outer_points: np.ndarray
+    skins: Tuple[PlyPlan, ...]
+    webs: Tuple[WebPlan, ...]
+    materials: Tuple[Dict, ...]
+    labelling: str
+
+
+def _frozen(points) -> np.ndarray:
+    points = np.array(points, dtype=np.float64)
+    points.flags.writeable = False
+    return points
+
+
+def _material_ids(mesh: AirfoilMesh) -> Dict[str, int]:
+    """Map material names to their index in the materials database, checking
+    that every name used by a skin or ply is defined."""
+    materials = mesh.materials or []
+    if not materials:
+        return {}
+    used_names = {s.material for s in mesh.skins.values()}
+    for web in mesh.webs.values():
+        used_names.update(ply.material for ply in web.plies)
+    name_to_id = {mat["name"]: idx for idx, mat in enumerate(materials)}
+    missing = [
+        f"'{name}'"
+        for name in used_names
+        if isinstance(name, str) and name not in name_to_id
+    ]
+    if missing:
+        raise ValueError(
+            "The following materials are not defined in the materials "
+            f"database: {', '.join(missing)}"
+        )
+    return name_to_id
+
+
+def _resolve(material: Union[int, str], name_to_id: Dict[str, int]) -> int:
+    if isinstance(material, str):
+        return name_to_id[material]
+    return material
+
+
+def _web_base_line(name: str, web, scale_factor: float) -> np.ndarray:
+    """The untrimmed base line of a web; points are scaled, coord_input is
+    taken as given."""
+    if web.coord_input is not None and len(web.coord_input) > 0:
+        return load_airfoil(web.coord_input, web.n_elem)
+    if web.points:
+        points: List[Tuple[float, float]] = [
+            (p[0] * scale_factor, p[1] * scale_factor) for p in web.points
+        ]
+        if len(points) == 2:
+            return create_line_mesh(*points, web.n_elem or 20)
+        return as_polyline(points)
+    raise ValueError(f"Web {name} must have either points or coord_input")
+
+
+def compile_mesh(mesh: AirfoilMesh) -> MeshPlan:
+    """Compile mesh into a MeshPlan, leaving mesh untouched."""
+    name_to_id = _material_ids(mesh)
+    sorted_skins = sorted(mesh.skins.values(), key=lambda s: s.sort_index)
+    skins = tuple(
+        PlyPlan(_resolve(s.material, name_to_id), s.thickness.compile())
+        for s in sorted_skins
+    )
+
+    with stage("load"):
+        # Load airfoil points (outer) and apply the scale factor
+        outer_points = load_airfoil(mesh.airfoil_input, mesh.n_elem)
+        if mesh.scale_factor != 1.0:
+            outer_points = outer_points * mesh.scale_factor
+        base_lines = [
+            _frozen(_web_base_line(name, web, mesh.scale_factor))
+            for name, web in mesh.webs.items()
+        ]
+
+    webs = tuple(
+        WebPlan(
+            name,
+            base_line,
+            tuple(
+                PlyPlan(_resolve(ply.material, name_to_id), ply.thickness.compile())
+                for ply in web.plies
+            ),
+            tuple(web.normal_ref),
+        )
+        for (name, web), base_line in zip(mesh.webs.items(), base_lines)
+    )
+    return MeshPlan(
+        outer_points=_frozen(outer_points),
+        skins=skins,
+        webs=webs,
+        materials=tuple(copy.deepcopy(mesh.materials or [])),
+        labelling=mesh.labelling,
+    )
@@ -0,0 +1,44 @@
+"""Topological region labelling of the constrained triangulation."""
+
+import numpy as np
+
+
+def face_adjacency(faces, constrained):
+    """Return (face, neighbor) index pairs across non-constrained edges.
+
+    faces is the (M, 3) face array and constrained flags the edge opposite
+    each corner, as returned by extract_triangulation. Edges on the boundary
+    of the finite faces have no neighbor and are skipped."""
+    n_faces = len(faces)
+    # Edge k of a face joins corners k + 1 and k + 2
+    edges = np.stack((faces[:, [1, 2, 0]], faces[:, [2, 0, 1]]), axis=-1)
+    edges = np.sort(edges.reshape(-1, 2), axis=1)
+    face_of = np.repeat(np.arange(n_faces), 3)
+    free = ~np.asarray(constrained, dtype=bool).reshape(-1)
+    edges, face_of = edges[free], face_of[free]
+    order = np.lexsort((edges[:, 1], edges[:, 0]))
+    edges, face_of = edges[order], face_of[order]
+    shared = (edges[1:] == edges[:-1]).all(axis=1)
+    return np.column_stack((face_of[:-1][shared], face_of[1:][shared]))
+
+
+def label_regions(n_faces, pairs):
+    """Flood fill faces into regions bounded by constrained edges.
+
+    Returns the number of regions and the region label of every face."""
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    graph = coo_matrix(
+        (np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])),
+        shape=(n_faces, n_faces),
+    )
+    return connected_components(graph, directed=False)
+
+
+def region_seeds(labels, weights):
+    """Pick one seed face per region, the one with the largest weight."""
+    order = np.lexsort((-weights, labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = labels[order][1:] != labels[order][:-1]
+    return order[first]
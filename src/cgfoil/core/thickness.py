@@ -0,0 +1,54 @@
+"""Memoized thickness evaluation."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from cgfoil.models import ThicknessPlan
+
+# Evaluated thicknesses by (definition hash, coordinates hash), least recently
+# used first
+_CACHE_SIZE = 128
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _coords_key(coords, names):
+    """Hash of the named coordinate arrays, missing names hash as empty."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(names):
+        values = np.ascontiguousarray(coords.get(name, []), dtype=np.float64)
+        digest.update(f"{name}:{len(values)}:".encode("utf-8"))
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def evaluate_thickness(thickness, coords):
+    """Evaluate a Thickness, or its compiled ThicknessPlan, on coords.
+
+    Results are cached on the definition and the coordinates the plan reads,
+    so sections sharing a coordinate system skip re-evaluation. The returned
+    array is read-only."""
+    if isinstance(thickness, ThicknessPlan):
+        plan = thickness
+    else:
+        plan = thickness.compile()
+    key = (plan.key, _coords_key(coords, plan.coord_names))
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+            return result
+    result = np.asarray(plan.evaluate(coords))
+    result.flags.writeable = False
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_thickness_cache():
+    """Drop all cached thickness evaluations."""
+    with _cache_lock:
+        _cache.clear()
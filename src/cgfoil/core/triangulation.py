@@ -0,0 +1,80 @@
+"""Constrained triangulation building utilities."""
+
+import numpy as np
+from CGAL.CGAL_Kernel import Point_2
+from CGAL.CGAL_Mesh_2 import Mesh_2_Constrained_Delaunay_triangulation_2_Edge as Edge
+
+
+def loop_edges(loops):
+    """Stack closed (n, 2) loops into unique points and unique edges.
+
+    Returns the (m, 2) array of unique points and the (k, 2) array of edges as
+    index pairs into it. Edges shared by neighbouring loops, such as the line
+    between two adjacent web plies, and degenerate edges are kept once."""
+    loops = [loop for loop in loops if len(loop)]
+    if not loops:
+        return np.empty((0, 2)), np.empty((0, 2), dtype=np.int64)
+    unique, inverse = np.unique(np.vstack(loops), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    edges = []
+    start = 0
+    for loop in loops:
+        idx = inverse[start : start + len(loop)]
+        edges.append(np.column_stack((idx, np.roll(idx, -1))))
+        start += len(loop)
+    edges = np.sort(np.vstack(edges), axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    # Keep the first occurrence of every edge, in insertion order
+    _, first = np.unique(edges, axis=0, return_index=True)
+    return unique, edges[np.sort(first)]
+
+
+def insert_constraints(cdt, loops):
+    """Insert closed loops as constraints in bulk.
+
+    Every unique point is inserted once through CGAL's range insertion, which
+    spatially sorts the points, the vertex handles are collected in a single
+    pass and the constraints are inserted by handle. Returns the number of
+    unique points and constraints inserted."""
+    points, edges = loop_edges(loops)
+    cdt.insert([Point_2(x, y) for x, y in points.tolist()])
+    handle_of = {}
+    for v in cdt.finite_vertices():
+        p = v.point()
+        handle_of[(p.x(), p.y())] = v
+    handles = [handle_of[(x, y)] for x, y in points.tolist()]
+    for a, b in edges.tolist():
+        cdt.insert_constraint(handles[a], handles[b])
+    return len(points), len(edges)
+
+
+def extract_triangulation(cdt, constrained_edges=False):
+    """Extract the finite vertices and faces of the triangulation in one pass.
+
+    Returns a contiguous (N, 2) float64 vertex array, an (M, 3) int32 face
+    array and, if constrained_edges is set, an (M, 3) bool array flagging
+    the edge opposite each face corner as constrained (else None). Face
+    corners are matched to vertices by coordinates rather than handles."""
+    vertices = []
+    for v in cdt.finite_vertices():
+        p = v.point()
+        vertices.append((p.x(), p.y()))
+    vertices = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 2)
+    corners = []
+    constrained = [] if constrained_edges else None
+    for face in cdt.finite_faces():
+        p0 = face.vertex(0).point()
+        p1 = face.vertex(1).point()
+        p2 = face.vertex(2).point()
+        corners.append((p0.x(), p0.y(), p1.x(), p1.y(), p2.x(), p2.y()))
+        if constrained_edges:
+            constrained.append([cdt.is_constrained(Edge(face, k)) for k in range(3)])
+    corners = np.ascontiguousarray(corners, dtype=np.float64).reshape(-1, 2)
+    # Complex keys order points by x, then y
+    keys = vertices.view(np.complex128).ravel()
+    order = np.argsort(keys)
+    positions = np.searchsorted(keys[order], corners.view(np.complex128).ravel())
+    faces = order[positions].astype(np.int32).reshape(-1, 3)
+    if constrained_edges:
+        constrained = np.array(constrained, dtype=bool).reshape(-1, 3)
+    return vertices, faces, constrained
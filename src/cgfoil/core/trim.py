@@ -1,25 +1,60 @@
 """Trimming utilities."""
 
 import math
-from CGAL.CGAL_Kernel import Point_2, Segment_2, do_intersect, intersection
+import numpy as np
+from cgfoil.utils.geometry import as_polyline, intersect_polyline, segments_intersect
 from cgfoil.utils.logger import logger
+from cgfoil.utils.profile import count
+
+
+def _overlapping_pairs(lower, upper):
+    """Index pairs of boxes that overlap, found with a sweep along x.
+
+    Boxes are sorted by their lower x bound, each box is only paired with the
+    boxes that start before it ends, and those are filtered on y."""
+    n = len(lower)
+    order = np.argsort(lower[:, 0], kind="stable")
+    stop = np.searchsorted(lower[order, 0], upper[order, 0], side="right")
+    start = np.arange(1, n + 1)
+    counts = np.maximum(stop - start, 0)
+    offsets = np.cumsum(counts) - counts
+    first = np.repeat(order, counts)
+    second = order[
+        np.arange(counts.sum()) - np.repeat(offsets, counts) + np.repeat(start, counts)
+    ]
+    overlap = (lower[first, 1] <= upper[second, 1]) & (
+        lower[second, 1] <= upper[first, 1]
+    )
+    return np.minimum(first, second)[overlap], np.maximum(first, second)[overlap]
+
+
+def find_self_intersections(points):
+    """Find intersecting pairs of non-adjacent segments of an open curve.
+
+    Only segment pairs with overlapping bounding boxes are tested, returns the
+    intersecting segment indices and the number of pairs tested."""
+    xy = as_polyline(points)
+    if len(xy) < 4:
+        return set(), 0
+    lower = np.minimum(xy[:-1], xy[1:])
+    upper = np.maximum(xy[:-1], xy[1:])
+    first, second = _overlapping_pairs(lower, upper)
+    candidates = second - first >= 2
+    first, second = first[candidates], second[candidates]
+    hit = segments_intersect(xy[first], xy[first + 1], xy[second], xy[second + 1])
+    intersecting_indices = set(first[hit].tolist()) | set(second[hit].tolist())
+    return intersecting_indices, len(first)
 
 
 def trim_self_intersecting_curve(points):
     """Trim the curve to remove loose ends by keeping the closed loop
     between self-intersection points."""
-    n = len(points)
-    intersecting_indices = set()
-    for i in range(n - 1):
-        seg1 = Segment_2(points[i], points[(i + 1) % n])
-        for j in range(i + 2, n - 1):
-            seg2 = Segment_2(points[j], points[(j + 1) % n])
-            if do_intersect(seg1, seg2):
-                intersecting_indices.add(i)
-                intersecting_indices.add(j)
+    points = as_polyline(points)
+    intersecting_indices, n_tested = find_self_intersections(points)
+    count("self_intersection_tests", n_tested)
     logger.info(
         f"Self intersecting indices: {intersecting_indices}, "
-        f"count: {len(intersecting_indices)}"
+        f"count: {len(intersecting_indices)}, segment pairs tested: {n_tested}"
     )
     if intersecting_indices:
         min_idx = min(intersecting_indices)
@@ -31,75 +66,61 @@ def trim_self_intersecting_curve(points):
 
 
 def trim_line(points, inner_points):
-    """Trim the line to keep only the piece between intersections with inner."""
-    inter_points = []
-    for i in range(len(points) - 1):
-        seg = Segment_2(points[i], points[i + 1])
-        for j in range(len(inner_points)):
-            inner_seg = Segment_2(
-                inner_points[j], inner_points[(j + 1) % len(inner_points)]
-            )
-            if do_intersect(seg, inner_seg):
-                inter = intersection(seg, inner_seg)
-                if inter.is_Point_2():
-                    inter_points.append(inter.get_Point_2())
-    logger.info(f"Found {len(inter_points)} intersection points with inner boundary")
-    if len(inter_points) >= 2:
-        all_points = points + inter_points
-        # Sort by distance from start
-        start = points[0]
-        all_points.sort(
-            key=lambda p: math.sqrt((p.x() - start.x()) ** 2 + (p.y() - start.y()) ** 2)
+    """Trim the line to keep only the piece between intersections with inner.
+
+    inner_points may be a loop prepared once with prepare_polygon and reused
+    for every web and ply."""
+    points = as_polyline(points)
+    inter_xy, seg_idx, t = intersect_polyline(points, inner_points)
+    logger.info(f"Found {len(inter_xy)} intersection points with inner boundary")
+    if len(inter_xy) >= 2:
+        # Keep the vertices between the first and last intersection
+        start = seg_idx[0] + t[0]
+        end = seg_idx[-1] + t[-1]
+        i = np.arange(len(points))
+        between = points[(start < i) & (i < end)]
+        trimmed = np.vstack((inter_xy[:1], between, inter_xy[-1:]))
+        logger.info(
+            f"Trimmed line to {len(trimmed)} points between "
+            f"parameters {start:.4f} to {end:.4f}"
         )
-        # Find indices of inter_points in sorted list
-        inter_set = set((p.x(), p.y()) for p in inter_points)
-        indices = [i for i, p in enumerate(all_points) if (p.x(), p.y()) in inter_set]
-        if indices:
-            min_idx = min(indices)
-            max_idx = max(indices)
-            trimmed = all_points[min_idx : max_idx + 1]
-            logger.info(
-                f"Trimmed line to {len(trimmed)} points between "
-                f"indices {min_idx} to {max_idx}"
-            )
-            return trimmed
+        return trimmed
     logger.info("No trimming applied, returning original points")
     return points
 
 
 def adjust_endpoints(points, distance):
     """Adjust endpoints to project out in line direction by distance."""
+    points = np.array(as_polyline(points))
     if len(points) < 2:
         return points
     # Compute overall direction from start to end
-    p_start = points[0]
-    p_end = points[-1]
-    overall_dx = p_end.x() - p_start.x()
-    overall_dy = p_end.y() - p_start.y()
+    p_start = points[0].tolist()
+    p_end = points[-1].tolist()
+    overall_dx = p_end[0] - p_start[0]
+    overall_dy = p_end[1] - p_start[1]
     len_overall = math.sqrt(overall_dx**2 + overall_dy**2)
     if len_overall > 0:
         overall_dx /= len_overall
         overall_dy /= len_overall
         # For start point, move backward along overall direction
-        new_p0 = Point_2(
-            p_start.x() - distance * overall_dx,
-            p_start.y() - distance * overall_dy,
+        points[0] = (
+            p_start[0] - distance * overall_dx,
+            p_start[1] - distance * overall_dy,
         )
         logger.info(
-            f"Adjusted start point from ({p_start.x():.4f}, {p_start.y():.4f}) "
-            f"to ({new_p0.x():.4f}, {new_p0.y():.4f}) along overall direction"
+            f"Adjusted start point from ({p_start[0]:.4f}, {p_start[1]:.4f}) "
+            f"to ({points[0, 0]:.4f}, {points[0, 1]:.4f}) along overall direction"
         )
-        points[0] = new_p0
         # For end point, move forward along overall direction
-        new_pn = Point_2(
-            p_end.x() + distance * overall_dx,
-            p_end.y() + distance * overall_dy,
+        points[-1] = (
+            p_end[0] + distance * overall_dx,
+            p_end[1] + distance * overall_dy,
         )
         logger.info(
-            f"Adjusted end point from ({p_end.x():.4f}, {p_end.y():.4f}) "
-            f"to ({new_pn.x():.4f}, {new_pn.y():.4f}) along overall direction"
+            f"Adjusted end point from ({p_end[0]:.4f}, {p_end[1]:.4f}) "
+            f"to ({points[-1, 0]:.4f}, {points[-1, 1]:.4f}) along overall direction"
         )
-        points[-1] = new_pn
     else:
         logger.warning("Overall direction length is zero, no adjustment made")
     return points
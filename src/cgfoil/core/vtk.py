@@ -1,37 +1,57 @@
 """VTK mesh building utilities."""
 
-import math
+import numpy as np
+from cgfoil.models import MeshResult
+from cgfoil.utils.summary import face_areas
+
+
+def _as_vectors3(vectors, n) -> np.ndarray:
+    """(n, 2) vectors as a contiguous (n, 3) float64 array with zero z."""
+    out = np.zeros((n, 3), dtype=np.float64)
+    if n:
+        out[:, :2] = np.asarray(vectors, dtype=np.float64).reshape(n, -1)[:, :2]
+    return out
 
 
 def build_vtk_mesh(mesh_result, mesh=None):
-    """Build a PyVista UnstructuredGrid from mesh_result and optional mesh."""
+    """Build a PyVista UnstructuredGrid from mesh_result and optional mesh.
+
+    The grid and its cell data are created from contiguous arrays, the
+    "Area" cell data are the face areas of the mesh result. Results in the
+    legacy list layout are accepted as well."""
     try:
         import pyvista as pv
-        import numpy as np
     except ImportError:
         raise ImportError("pyvista not available")
-    mesh_obj = pv.UnstructuredGrid(
-        np.array(mesh_result.faces).flatten(),
-        [pv.CellType.TRIANGLE] * len(mesh_result.faces),
-        mesh_result.vertices,
+    faces = np.asarray(mesh_result.faces, dtype=np.int64).reshape(
+        len(mesh_result.faces), -1
     )
-    mesh_obj.cell_data["material_id"] = mesh_result.face_material_ids
-    mesh_obj.cell_data["normals"] = np.array(
-        [[n[0], n[1], 0.0] for n in mesh_result.face_normals]
-    )
-    mesh_obj.cell_data["inplane"] = np.array(
-        [[i[0], i[1], 0.0] for i in mesh_result.face_inplanes]
+    if faces.shape[1] == 4:
+        faces = faces[:, 1:]
+    faces = np.ascontiguousarray(faces)
+    vertices = np.asarray(mesh_result.vertices, dtype=np.float64)
+    n_faces = len(faces)
+    points = _as_vectors3(vertices, len(vertices))
+    mesh_obj = pv.UnstructuredGrid({pv.CellType.TRIANGLE: faces}, points)
+
+    normals = _as_vectors3(mesh_result.face_normals, n_faces)
+    inplanes = _as_vectors3(mesh_result.face_inplanes, n_faces)
+    mesh_obj.cell_data["material_id"] = np.ascontiguousarray(
+        mesh_result.face_material_ids
     )
-    plane_orientations = []
-    for ix, iy in mesh_result.face_inplanes:
-        angle = math.degrees(math.atan2(iy, ix))
-        angle = (angle + 90) % 180 - 90
-        plane_orientations.append(angle)
-    mesh_obj.cell_data["plane_orientations"] = plane_orientations
+    mesh_obj.cell_data["normals"] = normals
+    mesh_obj.cell_data["inplane"] = inplanes
+    angles = np.degrees(np.arctan2(inplanes[:, 1], inplanes[:, 0]))
+    mesh_obj.cell_data["plane_orientations"] = (angles + 90) % 180 - 90
     # Add offset normals (inward for skins)
-    mesh_obj.cell_data["offset_normals"] = np.array(
-        [[-n[0], -n[1], 0.0] for n in mesh_result.face_normals]
-    )
-    # Compute cell sizes using pyvista
-    mesh_obj = mesh_obj.compute_cell_sizes()
+    mesh_obj.cell_data["offset_normals"] = -normals
+    # Cell sizes as compute_cell_sizes gives them, reusing the face areas
+    areas = None
+    if isinstance(mesh_result, MeshResult):
+        areas = mesh_result.face_areas
+    if areas is None:
+        areas = face_areas(vertices, faces)
+    mesh_obj.cell_data["Length"] = np.zeros(n_faces)
+    mesh_obj.cell_data["Area"] = np.ascontiguousarray(areas, dtype=np.float64)
+    mesh_obj.cell_data["Volume"] = np.zeros(n_faces)
     return mesh_obj
@@ -1,10 +1,38 @@
 """Pydantic data models for cgfoil inputs."""
 
-from typing import Union, List, Tuple, Dict, Optional, Any
-from pydantic import BaseModel, ConfigDict
+import hashlib
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import (
+    Union,
+    List,
+    Tuple,
+    Dict,
+    Optional,
+    Any,
+    Callable,
+    Literal,
+    NamedTuple,
+)
+from pydantic import BaseModel, ConfigDict, field_validator
 import numpy as np
 
 
+# Compiled thickness plans by definition, least recently used first
+_THICKNESS_PLAN_CACHE_SIZE = 256
+_thickness_plans: "OrderedDict[str, ThicknessPlan]" = OrderedDict()
+_thickness_plans_lock = threading.Lock()
+
+
+class ThicknessPlan(NamedTuple):
+    """A compiled Thickness: definition hash, coordinates read and evaluator."""
+
+    key: str
+    coord_names: frozenset
+    evaluate: Callable[[Dict[str, Any]], np.ndarray]
+
+
 class Thickness(BaseModel):
     """Model for thickness definitions."""
 
@@ -17,53 +45,102 @@ class Thickness(BaseModel):
     else_value: Optional[float] = 0.0
     array: Optional[List[float]] = None
 
-    def compute(self, coords: Dict[str, List[float]]) -> List[float]:
-        coord_vals = coords[self.coord]
+    def compile(self) -> ThicknessPlan:
+        """Compile the definition into a vectorized evaluator.
+
+        Plans are memoized on the definition, equal definitions share one."""
+        definition = self.model_dump_json()
+        with _thickness_plans_lock:
+            plan = _thickness_plans.get(definition)
+            if plan is not None:
+                _thickness_plans.move_to_end(definition)
+                return plan
+        coord_names = {self.coord}
+        if self.type == "condition":
+            coord_names.update(cond["coord"] for cond in self.conditions or [])
+        plan = ThicknessPlan(
+            hashlib.sha1(definition.encode("utf-8")).hexdigest(),
+            frozenset(coord_names),
+            self._build_evaluator(),
+        )
+        with _thickness_plans_lock:
+            _thickness_plans[definition] = plan
+            if len(_thickness_plans) > _THICKNESS_PLAN_CACHE_SIZE:
+                _thickness_plans.popitem(last=False)
+        return plan
+
+    def _build_evaluator(self) -> Callable[[Dict[str, Any]], np.ndarray]:
+        coord_name = self.coord
         if self.type == "constant":
-            return [self.value] * len(coord_vals)
+            value = self.value
+            return lambda coords: np.full(len(coords[coord_name]), value)
         elif self.type == "interp":
-            return np.interp(coord_vals, self.x, self.y).tolist()
+            xp = np.asarray(self.x, dtype=np.float64)
+            fp = np.asarray(self.y, dtype=np.float64)
+            return lambda coords: np.interp(
+                np.asarray(coords[coord_name], dtype=np.float64), xp, fp
+            )
         elif self.type == "condition":
-            result = []
-            for i in range(len(coord_vals)):
-                satisfied = True
-                if self.conditions:
-                    for cond in self.conditions:
-                        coord_list = coords.get(cond["coord"], [])
-                        coord = coord_list[i] if i < len(coord_list) else 0.0
-                        min_v, max_v = cond["range"]
-                        if not (min_v <= coord <= max_v):
-                            satisfied = False
-                            break
-                result.append(self.value if satisfied else self.else_value)
-            return result
+            ranges = [(cond["coord"], *cond["range"]) for cond in self.conditions or []]
+            value, else_value = self.value, self.else_value
+
+            def evaluate_condition(coords):
+                n_points = len(coords[coord_name])
+                satisfied = np.ones(n_points, dtype=bool)
+                for name, min_v, max_v in ranges:
+                    # Missing or short coordinate arrays read as 0.0
+                    coord = np.zeros(n_points)
+                    values = np.asarray(coords.get(name, []), dtype=np.float64)
+                    n_values = min(len(values), n_points)
+                    coord[:n_values] = values[:n_values]
+                    satisfied &= (min_v <= coord) & (coord <= max_v)
+                return np.where(satisfied, value, else_value)
+
+            return evaluate_condition
         elif self.type == "conditions":
-            result = []
-            for i, ci in enumerate(coord_vals):
-                val = self.else_value
-                if self.conditions:
-                    for cond in self.conditions:
-                        if (
-                            cond.get("min", -float("inf"))
-                            <= ci
-                            <= cond.get("max", float("inf"))
-                        ):
-                            val = cond["value"]
-                            break
-                result.append(val)
-            return result
+            conditions = self.conditions or []
+            lower = [cond.get("min", -np.inf) for cond in conditions]
+            upper = [cond.get("max", np.inf) for cond in conditions]
+            values = [cond["value"] for cond in conditions]
+            else_value = self.else_value
+
+            def evaluate_conditions(coords):
+                coord_vals = np.asarray(coords[coord_name], dtype=np.float64)
+                if not values:
+                    return np.full(len(coord_vals), else_value)
+                # The first matching condition wins
+                return np.select(
+                    [
+                        (lo <= coord_vals) & (coord_vals <= hi)
+                        for lo, hi in zip(lower, upper)
+                    ],
+                    values,
+                    default=else_value,
+                )
+
+            return evaluate_conditions
         elif self.type == "array":
             if self.array is None:
                 raise ValueError("Array must be provided for thickness type 'array'")
-            if len(self.array) != len(coord_vals):
-                raise ValueError(
-                    f"Array length {len(self.array)} does not match "
-                    f"number of points {len(coord_vals)}"
-                )
-            return self.array
+            array = np.asarray(self.array, dtype=np.float64)
+
+            def evaluate_array(coords):
+                n_points = len(coords[coord_name])
+                if len(array) != n_points:
+                    raise ValueError(
+                        f"Array length {len(array)} does not match "
+                        f"number of points {n_points}"
+                    )
+                return array.copy()
+
+            return evaluate_array
         else:
             raise ValueError(f"Unknown thickness type: {self.type}")
 
+    def compute(self, coords: Dict[str, Any]) -> np.ndarray:
+        """Evaluate the thickness at every point of coords[self.coord]."""
+        return self.compile().evaluate(coords)
+
 
 class Ply(BaseModel):
     """Model for a ply in a web."""
@@ -107,26 +184,150 @@ class AirfoilMesh(BaseModel):
     plot_filename: Optional[str] = None
     materials: Optional[List[Dict[str, Any]]] = None
     scale_factor: float = 1.0
+    labelling: Literal["centroid", "region"] = "centroid"
+
+
+def _as_array(value, dtype, width=None, name="array") -> np.ndarray:
+    """Convert value to an array of dtype, checking only shape and dtype.
+
+    Arrays of the right dtype are passed through without a copy; with width
+    set the result is an (n, width) array."""
+    array = np.asarray(value, dtype=dtype)
+    if width is None:
+        if array.ndim != 1:
+            raise ValueError(f"{name} must be one dimensional, got {array.shape}")
+        return array
+    if array.size == 0:
+        return array.reshape(0, width)
+    if array.ndim != 2 or array.shape[1] != width:
+        raise ValueError(f"{name} must have shape (n, {width}), got {array.shape}")
+    return array
 
 
 class MeshResult(BaseModel):
-    """Model for mesh generation results."""
+    """Model for mesh generation results, backed by NumPy arrays.
+
+    vertices is a float64 (N, 2) array, faces an int32 (M, 3) array of vertex
+    indices and the face attributes are arrays with one row per face. The
+    legacy layouts, (N, 3) vertices and [3, a, b, c] faces, are accepted and
+    converted; use as_lists for the list based layout. profile holds the
+    stage times and counters when meshing ran inside a profiling block."""
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    vertices: List[List[float]]
-    faces: List[List[int]]
-    outer_points: List[Tuple[float, float]]
-    inner_list: List[List[Tuple[float, float]]]
-    line_ply_list: List[List[Tuple[float, float]]]
-    untrimmed_lines: List[List[Tuple[float, float]]]
+    vertices: np.ndarray
+    faces: np.ndarray
+    outer_points: np.ndarray
+    inner_list: List[np.ndarray]
+    line_ply_list: List[np.ndarray]
+    untrimmed_lines: List[np.ndarray]
     web_material_ids: List[int]
     skin_material_ids: List[int]
     web_names: List[str]
-    face_normals: List[Tuple[float, float]]
-    face_material_ids: List[int]
-    face_inplanes: List[Tuple[float, float]]
+    face_normals: np.ndarray
+    face_material_ids: np.ndarray
+    face_inplanes: np.ndarray
+    face_areas: Optional[np.ndarray] = None
     areas: Dict[int, float]
     materials: Optional[List[Dict[str, Any]]] = None
-    skin_ply_thicknesses: List[List[float]]
-    web_ply_thicknesses: List[List[float]]
+    skin_ply_thicknesses: List[np.ndarray]
+    web_ply_thicknesses: List[np.ndarray]
+    profile: Optional[Dict[str, Any]] = None
+
+    @field_validator("vertices", mode="before")
+    @classmethod
+    def _check_vertices(cls, value):
+        array = np.asarray(value, dtype=np.float64)
+        if array.ndim == 2 and array.shape[1] == 3:
+            array = np.ascontiguousarray(array[:, :2])
+        return _as_array(array, np.float64, 2, "vertices")
+
+    @field_validator("faces", mode="before")
+    @classmethod
+    def _check_faces(cls, value):
+        array = np.asarray(value, dtype=np.int32)
+        if array.ndim == 2 and array.shape[1] == 4:
+            if (array[:, 0] != 3).any():
+                raise ValueError("faces in the [3, a, b, c] layout must be triangles")
+            array = np.ascontiguousarray(array[:, 1:])
+        return _as_array(array, np.int32, 3, "faces")
+
+    @field_validator("outer_points", "face_normals", "face_inplanes", mode="before")
+    @classmethod
+    def _check_points(cls, value, info):
+        return _as_array(value, np.float64, 2, info.field_name)
+
+    @field_validator("inner_list", "line_ply_list", "untrimmed_lines", mode="before")
+    @classmethod
+    def _check_polylines(cls, value, info):
+        return [_as_array(v, np.float64, 2, info.field_name) for v in value]
+
+    @field_validator("face_material_ids", mode="before")
+    @classmethod
+    def _check_material_ids(cls, value):
+        return _as_array(value, np.int32, name="face_material_ids")
+
+    @field_validator("face_areas", mode="before")
+    @classmethod
+    def _check_face_areas(cls, value):
+        if value is None:
+            return None
+        return _as_array(value, np.float64, name="face_areas")
+
+    @field_validator("skin_ply_thicknesses", "web_ply_thicknesses", mode="before")
+    @classmethod
+    def _check_thicknesses(cls, value, info):
+        return [_as_array(v, np.float64, name=info.field_name) for v in value]
+
+    def as_lists(self) -> SimpleNamespace:
+        """Return the result in the legacy list layout.
+
+        Vertices are [x, y, 0.0] lists, faces [3, a, b, c] lists and points,
+        normals and inplane vectors (x, y) tuples."""
+
+        def tuples(points):
+            return [tuple(p) for p in points.tolist()]
+
+        n_faces = len(self.faces)
+        return SimpleNamespace(
+            vertices=np.column_stack(
+                (self.vertices, np.zeros(len(self.vertices)))
+            ).tolist(),
+            faces=np.column_stack(
+                (np.full(n_faces, 3, dtype=np.int32), self.faces)
+            ).tolist(),
+            outer_points=tuples(self.outer_points),
+            inner_list=[tuples(inner) for inner in self.inner_list],
+            line_ply_list=[tuples(ply) for ply in self.line_ply_list],
+            untrimmed_lines=[tuples(line) for line in self.untrimmed_lines],
+            web_material_ids=list(self.web_material_ids),
+            skin_material_ids=list(self.skin_material_ids),
+            web_names=list(self.web_names),
+            face_normals=tuples(self.face_normals),
+            face_material_ids=self.face_material_ids.tolist(),
+            face_inplanes=tuples(self.face_inplanes),
+            face_areas=None if self.face_areas is None else self.face_areas.tolist(),
+            areas=dict(self.areas),
+            materials=self.materials,
+            skin_ply_thicknesses=[t.tolist() for t in self.skin_ply_thicknesses],
+            web_ply_thicknesses=[t.tolist() for t in self.web_ply_thicknesses],
+            profile=self.profile,
+        )
+
+
+class BatchError(BaseModel):
+    """Model for a failed task of a batch run."""
+
+    name: str
+    error_type: str
+    message: str
+    traceback: str = ""
+
+
+class BatchReport(BaseModel):
+    """Model for the outcome of a batch run."""
+
+    n_tasks: int = 0
+    succeeded: List[str] = []
+    errors: List[BatchError] = []
+    elapsed: Dict[str, float] = {}
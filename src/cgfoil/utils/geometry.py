@@ -1,5 +1,67 @@
 """Geometric utilities."""
 
+from typing import NamedTuple
+import numpy as np
+from cgfoil.utils.profile import count
+
+# Upper bound on the size of the (points x edges) work arrays used by the
+# vectorized ray caster, keeps memory bounded on large meshes.
+_CHUNK_ELEMENTS = 1 << 21
+
+
+class PolygonEdges(NamedTuple):
+    """Edge arrays of a closed polygon, prepared once for vectorized queries."""
+
+    start: np.ndarray
+    end: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+
+def as_polyline(points) -> np.ndarray:
+    """Return points (Point_2 list, tuple list or array) as an (n, 2) array.
+
+    Raises ValueError for input of any other shape, such as (n, 3) points."""
+    if not isinstance(points, np.ndarray):
+        points = list(points)
+        if points and callable(getattr(points[0], "x", None)):
+            return np.array([(p.x(), p.y()) for p in points], dtype=np.float64)
+    array = np.asarray(points, dtype=np.float64)
+    if array.size == 0:
+        return array.reshape(0, 2)
+    if array.ndim != 2 or array.shape[1] != 2:
+        raise ValueError(f"points must have shape (n, 2), got {array.shape}")
+    return array
+
+
+def outline_coordinates(points) -> dict:
+    """Coordinates along an outline: x, y, ta (absolute arc length), tr
+    (relative arc length) and xr (relative x from 0 to 1), as arrays."""
+    points = as_polyline(points)
+    x = points[:, 0]
+    dx = np.diff(points[:, 0])
+    dy = np.diff(points[:, 1])
+    ta = np.concatenate(([0.0], np.cumsum(np.sqrt(dx**2 + dy**2))))
+    tr = ta / ta[-1]
+    x_min = x.min()
+    x_max = x.max()
+    xr = (x - x_min) / (x_max - x_min)
+    return {"x": x, "y": points[:, 1], "ta": ta, "tr": tr, "xr": xr}
+
+
+def prepare_polygon(polygon) -> PolygonEdges:
+    """Build the edge arrays of a closed polygon, including the closing edge."""
+    if isinstance(polygon, PolygonEdges):
+        return polygon
+    start = as_polyline(polygon)
+    end = np.roll(start, -1, axis=0)
+    return PolygonEdges(
+        start=start,
+        end=end,
+        lower=np.minimum(start, end),
+        upper=np.maximum(start, end),
+    )
+
 
 def point_in_polygon(point, polygon):
     """Check if point is inside polygon using ray casting."""
@@ -18,3 +80,82 @@ def point_in_polygon(point, polygon):
                         inside = not inside
         p1x, p1y = p2x, p2y
     return inside
+
+
+def points_in_polygon(points, polygon) -> np.ndarray:
+    """Vectorized ray casting of an (n, 2) array of points against a polygon.
+
+    Gives the same answer as point_in_polygon for every point."""
+    points = as_polyline(points)
+    edges = prepare_polygon(polygon)
+    inside = np.zeros(len(points), dtype=bool)
+    n_edges = len(edges.start)
+    if n_edges == 0 or len(points) == 0:
+        return inside
+    p1x, p1y = edges.start[:, 0], edges.start[:, 1]
+    dx = edges.end[:, 0] - p1x
+    dy = edges.end[:, 1] - p1y
+    vertical = dx == 0
+    ymin, ymax, xmax = edges.lower[:, 1], edges.upper[:, 1], edges.upper[:, 0]
+    chunk = max(1, _CHUNK_ELEMENTS // n_edges)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for lo in range(0, len(points), chunk):
+            x = points[lo : lo + chunk, 0:1]
+            y = points[lo : lo + chunk, 1:2]
+            xinters = (y - p1y) * dx / dy + p1x
+            crossing = (
+                (y > ymin) & (y <= ymax) & (x <= xmax) & (vertical | (x <= xinters))
+            )
+            inside[lo : lo + chunk] = np.count_nonzero(crossing, axis=1) % 2 == 1
+    return inside
+
+
+def _orientation(a, b, c):
+    """Sign of the turn a -> b -> c for arrays of points."""
+    return np.sign(
+        (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+        - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    )
+
+
+def segments_intersect(a0, a1, b0, b1) -> np.ndarray:
+    """Test closed segments a0-a1 against b0-b1 pairwise, touching counts.
+
+    Expects segment pairs whose bounding boxes overlap, which settles the
+    collinear case."""
+    return (_orientation(a0, a1, b0) * _orientation(a0, a1, b1) <= 0) & (
+        _orientation(b0, b1, a0) * _orientation(b0, b1, a1) <= 0
+    )
+
+
+def intersect_polyline(points, polygon):
+    """Intersect every segment of an open polyline with the edges of a polygon.
+
+    Edge pairs are prefiltered on their bounding boxes, the remaining pairs are
+    solved in bulk. Returns the (k, 2) intersection points, the index of the
+    polyline segment each lies on and its parameter t in [0, 1] along that
+    segment, ordered along the polyline. Collinear overlaps are ignored."""
+    points = as_polyline(points)
+    edges = prepare_polygon(polygon)
+    a0, a1 = points[:-1], points[1:]
+    a_lower, a_upper = np.minimum(a0, a1), np.maximum(a0, a1)
+    seg_idx, edge_idx = np.nonzero(
+        (a_lower[:, None, 0] <= edges.upper[None, :, 0])
+        & (edges.lower[None, :, 0] <= a_upper[:, None, 0])
+        & (a_lower[:, None, 1] <= edges.upper[None, :, 1])
+        & (edges.lower[None, :, 1] <= a_upper[:, None, 1])
+    )
+    count("line_intersection_tests", len(seg_idx))
+    r = a1[seg_idx] - a0[seg_idx]
+    s = edges.end[edge_idx] - edges.start[edge_idx]
+    q = edges.start[edge_idx] - a0[seg_idx]
+    denom = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (q[:, 0] * s[:, 1] - q[:, 1] * s[:, 0]) / denom
+        u = (q[:, 0] * r[:, 1] - q[:, 1] * r[:, 0]) / denom
+    hit = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    seg_idx, t = seg_idx[hit], t[hit]
+    order = np.lexsort((t, seg_idx))
+    seg_idx, t = seg_idx[order], t[order]
+    inter_points = a0[seg_idx] + t[:, None] * (a1[seg_idx] - a0[seg_idx])
+    return inter_points, seg_idx, t
@@ -1,69 +1,163 @@
 """Input/Output utilities."""
 
-from CGAL.CGAL_Kernel import Point_2
-from scipy.interpolate import PchipInterpolator
+import hashlib
+import os
+import threading
+import warnings
+from collections import OrderedDict
 import numpy as np
-import math
+from cgfoil.utils.geometry import as_polyline
 from cgfoil.utils.logger import logger
+from cgfoil.utils.profile import stage
+
+# Extension of VTK mesh exports written by default, compressed binary XML
+VTK_EXTENSION = ".vtu"
+
+# Parsed airfoil files by absolute path, least recently used first; the
+# caches are shared between threads, every access holds their lock
+_airfoil_cache = OrderedDict()
+_airfoil_cache_lock = threading.Lock()
+_airfoil_cache_limit = 64
+
+# Arc length PCHIP fits by curve coordinates, least recently used first
+_PCHIP_CACHE_SIZE = 32
+_pchip_cache = OrderedDict()
+_pchip_cache_lock = threading.Lock()
+
+
+def _parse_dat(path):
+    """Parse the body of a .dat airfoil file into an (n, 2) array.
+
+    Lines with exactly two values are kept, the first line is a header."""
+    try:
+        with warnings.catch_warnings():
+            # An empty body is handled below
+            warnings.simplefilter("ignore", UserWarning)
+            points = np.loadtxt(
+                path, dtype=np.float64, skiprows=1, comments=None, ndmin=2
+            )
+        if points.size == 0:
+            return points.reshape(0, 2)
+        if points.shape[1] == 2:
+            return points
+    except ValueError:
+        pass
+    # Fall back to filtering the lines one by one
+    rows = []
+    with open(path, "r") as f:
+        lines = f.readlines()
+        for line in lines[1:]:  # Skip header
+            parts = line.strip().split()
+            if len(parts) == 2:
+                rows.append((float(parts[0]), float(parts[1])))
+    return np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+
+def read_airfoil_file(path):
+    """Read the points of a .dat or .vtk airfoil file as an (n, 2) array.
+
+    Files are parsed once per process and cached on their absolute path,
+    modification time and size, the returned array is read-only."""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _airfoil_cache_lock:
+        cached = _airfoil_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            _airfoil_cache.move_to_end(key)
+            return cached[1]
+    if path.endswith(".vtk"):
+        import pyvista as pv
+
+        mesh = pv.read(path)
+        points = np.array(mesh.points[:, :2], dtype=np.float64)
+    else:
+        points = _parse_dat(path)
+    points.flags.writeable = False
+    with _airfoil_cache_lock:
+        if _airfoil_cache_limit > 0:
+            _airfoil_cache[key] = (stamp, points)
+            _airfoil_cache.move_to_end(key)
+            while len(_airfoil_cache) > _airfoil_cache_limit:
+                _airfoil_cache.popitem(last=False)
+    return points
+
+
+def clear_airfoil_cache():
+    """Drop all cached airfoil files."""
+    with _airfoil_cache_lock:
+        _airfoil_cache.clear()
+
+
+def set_airfoil_cache_limit(limit):
+    """Set the number of airfoil files kept in the cache, 0 disables it."""
+    global _airfoil_cache_limit
+    if limit < 0:
+        raise ValueError(f"Cache limit must be non-negative, got {limit}")
+    with _airfoil_cache_lock:
+        _airfoil_cache_limit = limit
+        while len(_airfoil_cache) > limit:
+            _airfoil_cache.popitem(last=False)
 
 
 def load_airfoil(airfoil_input, n_elem=None):
-    """Load airfoil points from various inputs, optionally resample to n_elem
-    using PCHIP on arc length."""
+    """Load airfoil points from various inputs as an (n, 2) array, optionally
+    resample to n_elem using PCHIP on arc length."""
     if isinstance(airfoil_input, str):
-        if airfoil_input.endswith(".vtk"):
-            import pyvista as pv
-
-            mesh = pv.read(airfoil_input)
-            points_2d = mesh.points[:, :2].tolist()
-            points = [Point_2(x, y) for x, y in points_2d]
-        else:
-            points = []
-            with open(airfoil_input, "r") as f:
-                lines = f.readlines()
-                for line in lines[1:]:  # Skip header
-                    parts = line.strip().split()
-                    if len(parts) == 2:
-                        x = float(parts[0])
-                        y = float(parts[1])
-                        points.append(Point_2(x, y))
+        points = read_airfoil_file(airfoil_input).copy()
     else:
         # Assume list or ndarray
-        if isinstance(airfoil_input, np.ndarray):
-            points_2d = airfoil_input.tolist()
-        else:
-            points_2d = airfoil_input
-        points = [Point_2(x, y) for x, y in points_2d]
+        points = np.array(as_polyline(airfoil_input))
 
     if n_elem and len(points) != n_elem:
         return _resample_points(points, n_elem)
     return points
 
 
+def _fit_arc_length_pchip(points):
+    """Fit a PCHIP of the (n, 2) points over their cumulative arc length.
+
+    Fits are cached on the point coordinates, so resampling the same curve
+    at several resolutions fits it once. Returns the interpolator and the
+    total arc length."""
+    from scipy.interpolate import PchipInterpolator
+
+    key = (points.shape, hashlib.blake2b(points.tobytes(), digest_size=16).digest())
+    with _pchip_cache_lock:
+        cached = _pchip_cache.get(key)
+        if cached is not None:
+            _pchip_cache.move_to_end(key)
+            return cached
+    steps = np.hypot(np.diff(points[:, 0]), np.diff(points[:, 1]))
+    dists = np.concatenate(([0.0], np.cumsum(steps)))
+    # Interpolate x and y over arc length
+    fit = (PchipInterpolator(dists, points, axis=0), dists[-1])
+    with _pchip_cache_lock:
+        _pchip_cache[key] = fit
+        while len(_pchip_cache) > _PCHIP_CACHE_SIZE:
+            _pchip_cache.popitem(last=False)
+    return fit
+
+
 def _resample_points(points, n_elem):
     """Resample points to n_elem using PCHIP on arc length."""
-    x_orig = [p.x() for p in points]
-    y_orig = [p.y() for p in points]
-    dists = [0.0]
-    for i in range(1, len(points)):
-        dx = x_orig[i] - x_orig[i - 1]
-        dy = y_orig[i] - y_orig[i - 1]
-        dist = math.sqrt(dx**2 + dy**2)
-        dists.append(dists[-1] + dist)
-    total_length = dists[-1]
-    # Interpolate x and y over arc length
-    pchip_x = PchipInterpolator(dists, x_orig)
-    pchip_y = PchipInterpolator(dists, y_orig)
-    t_new = np.linspace(0, total_length, n_elem)
-    x_new = pchip_x(t_new)
-    y_new = pchip_y(t_new)
-    return [Point_2(xn, yn) for xn, yn in zip(x_new, y_new)]
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    pchip, total_length = _fit_arc_length_pchip(points)
+    return pchip(np.linspace(0, total_length, n_elem))
 
 
+@stage("export_vtk")
 def save_mesh_to_vtk(mesh_result, mesh, vtk_file):
-    """Save mesh result to VTK file."""
+    """Save mesh result to VTK file, binary and in the format of its extension.
+
+    .vtu files, the default when vtk_file has no extension, are written as
+    zlib compressed XML, .vtk files in the legacy format. Returns the path
+    written."""
     from cgfoil.core.vtk import build_vtk_mesh
 
+    if not os.path.splitext(vtk_file)[1]:
+        vtk_file += VTK_EXTENSION
     mesh_obj = build_vtk_mesh(mesh_result, mesh)
-    mesh_obj.save(vtk_file)
+    mesh_obj.save(vtk_file, binary=True, compression="zlib")
     logger.info(f"Mesh saved to {vtk_file}")
+    return vtk_file
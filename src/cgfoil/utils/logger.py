@@ -1,5 +1,6 @@
 """Logger configuration with rich formatting."""
 
+from contextlib import contextmanager
 from rich.logging import RichHandler
 from rich.console import Console
 import logging
@@ -16,3 +17,21 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger("cgfoil")
+
+
+@contextmanager
+def logging_to_stderr():
+    """Write log records to stderr for the block, keeping stdout for data."""
+    consoles = [
+        handler.console
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, RichHandler)
+    ]
+    files = [console.file for console in consoles]
+    for console in consoles:
+        console.file = sys.stderr
+    try:
+        yield
+    finally:
+        for console, file in zip(consoles, files):
+            console.file = file
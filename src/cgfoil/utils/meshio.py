@@ -0,0 +1,177 @@
+"""Binary mesh container for MeshResult.
+
+A mesh file starts with an 8 byte magic string and the little endian uint64
+length of a JSON header, followed by the array blocks. The header records the
+format version, metadata and the dtype, shape and offset of every block;
+blocks are 64 byte aligned so they can be memory-mapped in place. Lists of
+arrays of varying length are stored as one concatenated block plus an offsets
+block. Reading needs only numpy, MeshResult is built on request."""
+
+import json
+import pickle
+import struct
+import numpy as np
+from cgfoil.utils.logger import logger
+from cgfoil.utils.profile import stage
+
+MAGIC = b"CGFMESH\x00"
+VERSION = 1
+_ALIGN = 64
+
+# Per-face and per-vertex arrays, with their on-disk dtype
+_ARRAYS = {
+    "vertices": "<f8",
+    "faces": "<i4",
+    "outer_points": "<f8",
+    "face_normals": "<f8",
+    "face_material_ids": "<i4",
+    "face_inplanes": "<f8",
+    "face_areas": "<f8",
+}
+# Lists of arrays, with their dtype and row width (None for 1D arrays)
+_RAGGED = {
+    "inner_list": ("<f8", 2),
+    "line_ply_list": ("<f8", 2),
+    "untrimmed_lines": ("<f8", 2),
+    "skin_ply_thicknesses": ("<f8", None),
+    "web_ply_thicknesses": ("<f8", None),
+}
+_META = ("web_material_ids", "skin_material_ids", "web_names", "materials")
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+@stage("save_mesh")
+def save_mesh(mesh_result, path):
+    """Write a MeshResult to a binary mesh file."""
+    blocks = {}
+    for name, dtype in _ARRAYS.items():
+        value = getattr(mesh_result, name, None)
+        if value is not None:
+            blocks[name] = np.ascontiguousarray(value, dtype=dtype)
+    for name, (dtype, width) in _RAGGED.items():
+        shape = (-1, width) if width else (-1,)
+        parts = [
+            np.asarray(v, dtype=dtype).reshape(shape)
+            for v in getattr(mesh_result, name)
+        ]
+        lengths = [len(part) for part in parts]
+        empty = np.empty((0, width) if width else (0,), dtype=dtype)
+        blocks[f"{name}.data"] = np.ascontiguousarray(
+            np.concatenate(parts) if parts else empty, dtype=dtype
+        )
+        blocks[f"{name}.offsets"] = np.concatenate(([0], np.cumsum(lengths))).astype(
+            "<i8"
+        )
+
+    entries = {}
+    offset = 0
+    for name, array in blocks.items():
+        offset = _aligned(offset)
+        entries[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += array.nbytes
+    meta = {name: getattr(mesh_result, name) for name in _META}
+    meta["areas"] = [[int(k), float(v)] for k, v in mesh_result.areas.items()]
+    header = json.dumps({"version": VERSION, "arrays": entries, "meta": meta}).encode(
+        "utf-8"
+    )
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        data_start = _aligned(f.tell())
+        for name, array in blocks.items():
+            f.seek(data_start + entries[name]["offset"])
+            f.write(array.tobytes())
+
+
+def is_mesh_file(path):
+    """Check whether path is a binary mesh file, as opposed to a legacy pickle."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class MeshFile:
+    """Read access to a binary mesh file, arrays are memory-mapped on demand."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a cgfoil mesh file")
+            (length,) = struct.unpack("<Q", f.read(8))
+            self.header = json.loads(f.read(length).decode("utf-8"))
+            self._data_start = _aligned(f.tell())
+        version = self.header.get("version")
+        if version != VERSION:
+            raise ValueError(f"Unsupported mesh file version {version} in {path}")
+
+    @property
+    def meta(self):
+        return self.header["meta"]
+
+    @property
+    def areas(self):
+        return {int(k): v for k, v in self.meta["areas"]}
+
+    def array(self, name):
+        """Return the named array as a read-only memory map."""
+        entry = self.header["arrays"].get(name)
+        if entry is None:
+            raise KeyError(f"No array {name} in {self.path}")
+        shape = tuple(entry["shape"])
+        if 0 in shape:
+            return np.empty(shape, dtype=entry["dtype"])
+        return np.memmap(
+            self.path,
+            dtype=entry["dtype"],
+            mode="r",
+            offset=self._data_start + entry["offset"],
+            shape=shape,
+        )
+
+    def ragged(self, name):
+        """Return a stored list of arrays as views into one memory map."""
+        data = self.array(f"{name}.data")
+        offsets = np.asarray(self.array(f"{name}.offsets")).tolist()
+        return [data[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+    def to_result(self):
+        """Build a MeshResult backed by the memory-mapped arrays."""
+        from cgfoil.models import MeshResult
+
+        fields = {n: self.array(n) for n in _ARRAYS if n in self.header["arrays"]}
+        fields.update({n: self.ragged(n) for n in _RAGGED})
+        fields.update({n: self.meta[n] for n in _META})
+        fields["areas"] = self.areas
+        return MeshResult(**fields)
+
+
+@stage("load_mesh")
+def load_mesh(path, allow_pickle: bool = False):
+    """Load a MeshResult from a binary mesh file.
+
+    Legacy pickle mesh files are only read with allow_pickle, unpickling a
+    file can run arbitrary code so only do so for files you trust."""
+    if is_mesh_file(path):
+        return MeshFile(path).to_result()
+    if not allow_pickle:
+        raise ValueError(
+            f"{path} is not a cgfoil mesh file. Legacy pickle mesh files are "
+            "not loaded as unpickling can run arbitrary code; if you trust "
+            f"the file, convert it with: cgfoil convert {path} <new mesh file>"
+        )
+    logger.warning(f"Loading {path} as a legacy pickle mesh file")
+    with open(path, "rb") as f:
+        mesh_result = pickle.load(f)
+    # Pickles of the list based MeshResult are restored without validation
+    from cgfoil.models import MeshResult
+
+    return MeshResult(**dict(mesh_result.__dict__))
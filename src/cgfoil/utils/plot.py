@@ -1,9 +1,66 @@
 """Plotting utilities."""
 
-import matplotlib.pyplot as plt
-import math
-from collections import defaultdict
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+import numpy as np
+from cgfoil.utils.geometry import as_polyline, outline_coordinates
 from cgfoil.utils.logger import logger
+from cgfoil.utils.profile import stage
+
+
+def _rows(values, dtype, width):
+    """values as a 2D array with one row per item, (0, width) when empty."""
+    array = np.asarray(values, dtype=dtype)
+    if array.size == 0:
+        return np.empty((0, width), dtype=dtype)
+    return array.reshape(len(array), -1)
+
+
+def _closed(points):
+    """x and y of a polyline with its first point repeated at the end."""
+    closed = np.vstack((points, points[:1]))
+    return closed[:, 0], closed[:, 1]
+
+
+def max_thickness_at(points):
+    """x position and size of the largest y extent over points sharing an x
+    rounded to 4 decimals, (0, 0) without any positive extent.
+
+    Ties go to the x that appears first in points."""
+    points = as_polyline(points)
+    if not len(points):
+        return 0, 0
+    keys, first, inverse = np.unique(
+        np.round(points[:, 0], 4), return_index=True, return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    y_max = np.full(len(keys), -np.inf)
+    y_min = np.full(len(keys), np.inf)
+    np.maximum.at(y_max, inverse, points[:, 1])
+    np.minimum.at(y_min, inverse, points[:, 1])
+    thickness = y_max - y_min
+    best = thickness.max()
+    if not best > 0:
+        return 0, 0
+    candidates = np.flatnonzero(thickness == best)
+    winner = candidates[np.argmin(first[candidates])]
+    return float(keys[winner]), float(best)
+
+
+def _new_figure(figsize, interactive):
+    """A figure for the plot: a pyplot figure to show on screen, otherwise a
+    standalone Agg figure that is not registered with pyplot."""
+    if interactive:
+        import matplotlib.pyplot as plt
+
+        return plt.figure(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
 
 
 def plot_triangulation(
@@ -23,15 +80,28 @@ def plot_triangulation(
     plot_filename=None,
 ):
     """Plot the triangulation with filled triangles colored by material id
-    and colorbar."""
+    and colorbar.
+
+    Points and polylines are (n, 2) arrays; lists of tuples or Point_2 are
+    accepted as well.
+
+    With plot_filename the plot is rendered on its own Agg figure, saved and
+    released without touching pyplot, so plots can be made from several
+    threads or processes at once. Otherwise it is shown with pyplot."""
 
     # Increase figure size by 2 in both dimensions
-    default_width, default_height = plt.rcParams["figure.figsize"]
+    default_width, default_height = matplotlib.rcParams["figure.figsize"]
     if plot_filename:
         figsize = (default_width * 2, default_height * 2)
     else:
         figsize = (default_width + 2, default_height + 2)
-    plt.figure(figsize=figsize)
+    outer_points = as_polyline(outer_points)
+    inner_list = [as_polyline(points) for points in inner_list]
+    line_ply_list = [as_polyline(points) for points in line_ply_list]
+    untrimmed_lines = [as_polyline(points) for points in untrimmed_lines]
+
+    fig = _new_figure(figsize, interactive=not plot_filename)
+    ax = fig.add_subplot()
 
     def rescale_plot(ax, scale=1.1):
         xmin, xmax = ax.get_xlim()
@@ -43,114 +113,89 @@ def plot_triangulation(
         ax.set_xlim(xmid - xran * scale, xmid + xran * scale)
         ax.set_ylim(ymid - yran * scale, ymid + yran * scale)
 
-    cmap = plt.cm.viridis
+    cmap = matplotlib.colormaps["viridis"]
     all_ids = web_material_ids + skin_material_ids
     max_id = max(all_ids) if all_ids else 0
 
-    # Compute ta and tr
-    x_list = [p.x() for p in outer_points]
-    ta_list = [0.0]
-    for i in range(1, len(outer_points)):
-        dx = outer_points[i].x() - outer_points[i - 1].x()
-        dy = outer_points[i].y() - outer_points[i - 1].y()
-        dist = math.sqrt(dx**2 + dy**2)
-        ta_list.append(ta_list[-1] + dist)
-    total_length = ta_list[-1]
-    tr_list = [t / total_length for t in ta_list]
-
-    # Compute xr
-    x_min = min(x_list)
-    x_max = max(x_list)
-    xr_list = [(xi - x_min) / (x_max - x_min) for xi in x_list]
+    # Compute ta, tr and xr
+    coords = outline_coordinates(outer_points)
+    x_list = coords["x"]
 
     if split_view:
         # Compute max_y for offset
-        all_points = outer_points[:]
-        for inner in inner_list:
-            all_points.extend(inner)
-        for ply in line_ply_list:
-            all_points.extend(ply)
-        max_y = max(p.y() for p in all_points) if all_points else 0
+        all_points = np.vstack([outer_points] + inner_list + line_ply_list)
+        max_y = all_points[:, 1].max() if len(all_points) else 0
         offset_y = 3 * max_y
 
         # Plot boundaries at +offset_y
-        xs = [p.x() for p in outer_points] + [outer_points[0].x()]
-        ys = [p.y() + offset_y for p in outer_points] + [outer_points[0].y() + offset_y]
-        plt.plot(xs, ys, "r-", linewidth=2)
+        xs, ys = _closed(outer_points)
+        ax.plot(xs, ys + offset_y, "r-", linewidth=2)
 
         colors = ["g-", "c-", "m-", "y-"]
         for idx, inner_points in enumerate(inner_list):
-            xs = [p.x() for p in inner_points] + [inner_points[0].x()]
-            ys = [p.y() + offset_y for p in inner_points] + [
-                inner_points[0].y() + offset_y
-            ]
-            plt.plot(xs, ys, colors[idx % len(colors)], linewidth=2)
+            xs, ys = _closed(inner_points)
+            ax.plot(xs, ys + offset_y, colors[idx % len(colors)], linewidth=2)
 
         for idx, ply_points in enumerate(line_ply_list):
-            xs = [p.x() for p in ply_points] + [ply_points[0].x()]
-            ys = [p.y() + offset_y for p in ply_points] + [ply_points[0].y() + offset_y]
+            xs, ys = _closed(ply_points)
+            ys = ys + offset_y
             if max_id == 0:
                 color = cmap(0)
             else:
                 color = cmap(web_material_ids[idx] / max_id)
-            plt.plot(xs, ys, color=color, linewidth=2)
+            ax.plot(xs, ys, color=color, linewidth=2)
 
         # Plot untrimmed lines at +offset_y
         for untrimmed in untrimmed_lines:
-            xs = [p.x() for p in untrimmed]
-            ys = [p.y() + offset_y for p in untrimmed]
-            plt.plot(xs, ys, "k-", alpha=0.1)
+            ax.plot(untrimmed[:, 0], untrimmed[:, 1] + offset_y, "k-", alpha=0.1)
 
         # Annotate web names at +offset_y
         for idx, line in enumerate(untrimmed_lines):
-            max_y_point = max(line, key=lambda p: p.y())
-            plt.text(
-                max_y_point.x(),
-                max_y_point.y() + offset_y,
+            max_y_point = line[np.argmax(line[:, 1])]
+            ax.text(
+                max_y_point[0],
+                max_y_point[1] + offset_y,
                 web_names[idx],
                 fontsize=12,
                 ha="center",
                 va="bottom",
             )
 
-    centroids = []
-    normals = []
-    inplanes = []
-    idx = 0
-    for face in faces:
-        material_id = face_material_ids[idx]
-        if material_id != -1:
-            _, v0, v1, v2 = face
-            p0 = vertices[v0][:2]
-            p1 = vertices[v1][:2]
-            p2 = vertices[v2][:2]
-            cx = (p0[0] + p1[0] + p2[0]) / 3.0
-            cy = (p0[1] + p1[1] + p2[1]) / 3.0
-            xs = [p0[0], p1[0], p2[0]]
-            ys = [p0[1], p1[1], p2[1]]
-            if max_id == 0:
-                color = cmap(0)
-            else:
-                color = cmap(material_id / max_id)
-            plt.fill(xs, ys, color=color, alpha=0.5)
-            centroids.append((cx, cy))
-            normals.append(face_normals[idx])
-            inplanes.append(face_inplanes[idx])
-        idx += 1
+    # Fill the faces with one collection, colored by material id
+    face_ids = np.asarray(face_material_ids, dtype=np.int64).reshape(-1)
+    keep = face_ids != -1
+    points = _rows(vertices, np.float64, 2)[:, :2]
+    corners = _rows(faces, np.int64, 3)[:, -3:]
+    triangles = points[corners[keep]]
+    if max_id == 0:
+        colors = cmap(np.zeros(keep.sum()))
+    else:
+        colors = cmap(face_ids[keep] / max_id)
+    ax.add_collection(
+        PolyCollection(
+            triangles,
+            facecolors=colors,
+            edgecolors=colors,
+            linewidths=matplotlib.rcParams["patch.linewidth"],
+            alpha=0.5,
+        )
+    )
+    ax.autoscale_view()
+    centroids = triangles.mean(axis=1)
+    normals = _rows(face_normals, np.float64, 2)[keep]
+    inplanes = _rows(face_inplanes, np.float64, 2)[keep]
 
     if not split_view:
         # Plot the input lines without trim using alpha=0.1
         for untrimmed in untrimmed_lines:
-            xs = [p.x() for p in untrimmed]
-            ys = [p.y() for p in untrimmed]
-            plt.plot(xs, ys, "k-", alpha=0.1)
+            ax.plot(untrimmed[:, 0], untrimmed[:, 1], "k-", alpha=0.1)
 
         # Annotate web names at the upper end
         for idx, line in enumerate(untrimmed_lines):
-            max_y_point = max(line, key=lambda p: p.y())
-            plt.text(
-                max_y_point.x(),
-                max_y_point.y(),
+            max_y_point = line[np.argmax(line[:, 1])]
+            ax.text(
+                max_y_point[0],
+                max_y_point[1],
                 web_names[idx],
                 fontsize=12,
                 ha="center",
@@ -158,58 +203,42 @@ def plot_triangulation(
             )
 
         # Plot the boundaries
-        xs = [p.x() for p in outer_points] + [outer_points[0].x()]
-        ys = [p.y() for p in outer_points] + [outer_points[0].y()]
-        plt.plot(xs, ys, "r-", linewidth=2)
+        ax.plot(*_closed(outer_points), "r-", linewidth=2)
 
         colors = ["g-", "c-", "m-", "y-"]
         for idx, inner_points in enumerate(inner_list):
-            xs = [p.x() for p in inner_points] + [inner_points[0].x()]
-            ys = [p.y() for p in inner_points] + [inner_points[0].y()]
-            plt.plot(xs, ys, colors[idx % len(colors)], linewidth=2)
+            ax.plot(*_closed(inner_points), colors[idx % len(colors)], linewidth=2)
 
         for idx, ply_points in enumerate(line_ply_list):
-            xs = [p.x() for p in ply_points] + [ply_points[0].x()]
-            ys = [p.y() for p in ply_points] + [ply_points[0].y()]
+            xs, ys = _closed(ply_points)
             if max_id == 0:
                 color = cmap(0)
             else:
                 color = cmap(web_material_ids[idx] / max_id)
-            plt.plot(xs, ys, color=color, linewidth=2)
+            ax.plot(xs, ys, color=color, linewidth=2)
 
     # Add dashed axvline at position of maximum thickness
-    all_points = outer_points[:]
-    for inner in inner_list:
-        all_points.extend(inner)
-    x_to_ys = defaultdict(list)
-    for p in all_points:
-        x_rounded = round(p.x(), 4)
-        x_to_ys[x_rounded].append(p.y())
-    max_thickness = 0
-    max_thickness_x = 0
-    for x, ys in x_to_ys.items():
-        thickness = max(ys) - min(ys)
-        if thickness > max_thickness:
-            max_thickness = thickness
-            max_thickness_x = x
-    plt.axvline(max_thickness_x, linestyle="--", color="black", linewidth=1)
+    max_thickness_x, max_thickness = max_thickness_at(
+        np.vstack([outer_points] + inner_list)
+    )
+    ax.axvline(max_thickness_x, linestyle="--", color="black", linewidth=1)
     # Find indices for ta and tr at this x
-    idxs = [i for i in range(len(x_list)) if abs(x_list[i] - max_thickness_x) < 1e-3]
-    ta_vals = [ta_list[i] for i in idxs]
-    tr_vals = [tr_list[i] for i in idxs]
-    xr_vals = [xr_list[i] for i in idxs]
+    idxs = np.flatnonzero(np.abs(x_list - max_thickness_x) < 1e-3)
+    ta_vals = coords["ta"][idxs]
+    tr_vals = coords["tr"][idxs]
+    xr_vals = coords["xr"][idxs]
     # Add text label
-    rescale_plot(plt.gca())
-    _, ymax = plt.ylim()
+    rescale_plot(ax)
+    _, ymax = ax.get_ylim()
     if len(ta_vals) == 2:
         ta_str = f"{ta_vals[0]:.3f}, {ta_vals[1]:.3f}"
         tr_str = f"{tr_vals[0]:.3f}, {tr_vals[1]:.3f}"
         xr_str = f"{xr_vals[0]:.3f}, {xr_vals[1]:.3f}"
     else:
-        ta_str = f"{ta_vals[0]:.3f}" if ta_vals else "N/A"
-        tr_str = f"{tr_vals[0]:.3f}" if tr_vals else "N/A"
-        xr_str = f"{xr_vals[0]:.3f}" if xr_vals else "N/A"
-    plt.text(
+        ta_str = f"{ta_vals[0]:.3f}" if len(ta_vals) else "N/A"
+        tr_str = f"{tr_vals[0]:.3f}" if len(tr_vals) else "N/A"
+        xr_str = f"{xr_vals[0]:.3f}" if len(xr_vals) else "N/A"
+    ax.text(
         max_thickness_x,
         ymax + 0.01,
         f"x={max_thickness_x:.3f}\nta={ta_str}\ntr={tr_str}\nxr={xr_str}"
@@ -221,49 +250,59 @@ def plot_triangulation(
     )
 
     # Add colorbar
-    sm = plt.cm.ScalarMappable(cmap=cmap, norm=plt.Normalize(vmin=0, vmax=max_id))
+    sm = ScalarMappable(cmap=cmap, norm=Normalize(vmin=0, vmax=max_id))
     sm.set_array([])
-    plt.colorbar(sm, ax=plt.gca(), label="Material ID")
+    fig.colorbar(sm, ax=ax, label="Material ID")
 
     # Add quiver plot for normals and inplanes
-    if centroids and normals and inplanes:
-        cx_list, cy_list = zip(*centroids)
+    if len(centroids):
+        cx, cy = centroids[:, 0], centroids[:, 1]
         if split_view:
-            cy_list = [cy - offset_y for cy in cy_list]
-        # print(cy_list)
-        nx_list, ny_list = zip(*normals)
-        plt.quiver(
-            cx_list,
-            cy_list,
-            nx_list,
-            ny_list,
-            scale=30,
-            color="blue",
-            alpha=0.5,
-            width=0.0008,
-        )
-
-        ix_list, iy_list = zip(*inplanes)
-        plt.quiver(
-            cx_list,
-            cy_list,
-            ix_list,
-            iy_list,
-            scale=30,
-            color="red",
-            alpha=0.5,
-            width=0.0008,
-        )
+            cy = cy - offset_y
+        for vectors, color in ((normals, "blue"), (inplanes, "red")):
+            ax.quiver(
+                cx,
+                cy,
+                vectors[:, 0],
+                vectors[:, 1],
+                scale=30,
+                color=color,
+                alpha=0.5,
+                width=0.0008,
+            )
 
-    plt.axis("equal")
-    plt.grid(True)
-    plt.tight_layout()
-    # Set to fullscreen
-    fig = plt.gcf()
-    if hasattr(fig.canvas.manager, "full_screen_toggle"):
-        fig.canvas.manager.full_screen_toggle()
+    ax.axis("equal")
+    ax.grid(True)
+    fig.tight_layout()
     if plot_filename:
-        plt.savefig(plot_filename)
+        fig.savefig(plot_filename)
+        fig.clear()
         logger.info(f"Plot saved to {plot_filename}")
     else:
+        import matplotlib.pyplot as plt
+
+        # Set to fullscreen
+        if hasattr(fig.canvas.manager, "full_screen_toggle"):
+            fig.canvas.manager.full_screen_toggle()
         plt.show()
+
+
+@stage("plot")
+def plot_mesh(mesh_result, plot_filename=None, split_view=False):
+    """Plot a MeshResult straight from its arrays, without CGAL."""
+    plot_triangulation(
+        mesh_result.vertices,
+        mesh_result.faces,
+        mesh_result.outer_points,
+        mesh_result.inner_list,
+        mesh_result.line_ply_list,
+        mesh_result.untrimmed_lines,
+        mesh_result.web_material_ids,
+        mesh_result.skin_material_ids,
+        mesh_result.web_names,
+        mesh_result.face_normals,
+        mesh_result.face_material_ids,
+        mesh_result.face_inplanes,
+        split_view,
+        plot_filename,
+    )
@@ -0,0 +1,107 @@
+"""Opt-in stage timers and counters.
+
+Profiling is enabled for a block with `with profiling() as profile:`, the
+active profile lives in a context variable so concurrent threads and tasks
+each record their own. Outside such a block stage and count do nothing."""
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+_active: ContextVar[Optional["Profile"]] = ContextVar("cgfoil_profile", default=None)
+
+
+class Profile:
+    """Accumulated stage times in seconds, with call counts, and counters.
+
+    Stages may nest, an outer stage includes the time of the stages it
+    encloses."""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._start = time.perf_counter()
+
+    def add_time(self, name: str, seconds: float):
+        entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": time.perf_counter() - self._start,
+            "stages": {name: dict(entry) for name, entry in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def save(self, path: str):
+        """Write the profile as JSON to path, "-" writes to stdout."""
+        text = json.dumps(self.as_dict(), indent=2)
+        if path == "-":
+            print(text)
+        else:
+            with open(path, "w") as f:
+                f.write(text + "\n")
+
+
+def current_profile() -> Optional[Profile]:
+    """The active profile, or None when profiling is off."""
+    return _active.get()
+
+
+@contextmanager
+def profiling(profile: Optional[Profile] = None):
+    """Record stages and counters into profile, a new one by default."""
+    profile = profile if profile is not None else Profile()
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def profile_to(path: Optional[str]):
+    """Profile the block and save the report to path, a no-op without path.
+
+    With path "-" the report goes to stdout and logging to stderr meanwhile,
+    so stdout holds only the JSON report."""
+    if not path:
+        yield None
+        return
+    if path == "-":
+        from cgfoil.utils.logger import logging_to_stderr
+
+        redirect = logging_to_stderr()
+    else:
+        redirect = nullcontext()
+    with redirect:
+        with profiling() as profile:
+            yield profile
+        profile.save(path)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as stage name of the active profile."""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_time(name, time.perf_counter() - start)
+
+
+def count(name: str, n: int = 1):
+    """Add n to counter name of the active profile."""
+    profile = _active.get()
+    if profile is not None:
+        profile.count(name, n)
@@ -1,6 +1,7 @@
 """Summarizing utilities."""
 
 from typing import Dict
+import numpy as np
 
 
 def compute_cross_sectional_areas(cdt, face_material_ids) -> Dict[int, float]:
@@ -20,3 +21,27 @@ def compute_cross_sectional_areas(cdt, face_material_ids) -> Dict[int, float]:
             areas[material_id] = areas.get(material_id, 0) + area
         idx += 1
     return areas
+
+
+def face_areas(vertices, faces) -> np.ndarray:
+    """Compute the area of every face of an (M, 3) face array."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces)
+    x1, y1 = vertices[faces[:, 0], 0], vertices[faces[:, 0], 1]
+    x2, y2 = vertices[faces[:, 1], 0], vertices[faces[:, 1], 1]
+    x3, y3 = vertices[faces[:, 2], 0], vertices[faces[:, 2], 1]
+    return 0.5 * np.abs(x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+
+
+def sum_areas_by_material(areas, face_material_ids) -> Dict[int, float]:
+    """Sum face areas per material ID, faces with material ID -1 are skipped.
+
+    Materials are listed in order of first appearance."""
+    material_ids = np.asarray(face_material_ids)
+    keep = material_ids != -1
+    ids, first, inverse = np.unique(
+        material_ids[keep], return_index=True, return_inverse=True
+    )
+    totals = np.bincount(inverse.reshape(-1), weights=np.asarray(areas)[keep])
+    order = np.argsort(first)
+    return dict(zip(ids[order].tolist(), totals[order].tolist()))
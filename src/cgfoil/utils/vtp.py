@@ -0,0 +1,115 @@
+"""Reading of multi-section blade VTP files."""
+
+import re
+from typing import Dict, NamedTuple, Optional, Sequence
+import numpy as np
+
+# Panel ids of the airfoil, trailing edge and webs in a sections file
+AIRFOIL_PANELS = (0, 12)
+TE_PANEL = -3
+WEB_PANELS = {"web1": -1, "web2": -2}
+
+
+class Panel(NamedTuple):
+    """Points of a group of cells, with cell arrays averaged to the points."""
+
+    points: np.ndarray
+    point_data: Dict[str, np.ndarray]
+
+
+class Section(NamedTuple):
+    """The airfoil, trailing edge and web panels of one section."""
+
+    section_id: int
+    airfoil: Panel
+    te: Panel
+    webs: Dict[str, Panel]
+
+    def outline(self) -> np.ndarray:
+        """Closed airfoil outline, the airfoil points followed by the
+        trailing edge points, dropping the point they share."""
+        return np.vstack((self.airfoil.points[:-1], self.te.points[1:]))
+
+
+def thickness_arrays(names) -> list:
+    """The ply_*_thickness array names, sorted by ply number."""
+    names = [n for n in names if re.match(r"ply_.*_thickness", n)]
+    return sorted(names, key=lambda n: int(re.search(r"ply_(\d+)", n).group(1)))
+
+
+def _panel(cells, offsets, connectivity, points, cell_arrays) -> Panel:
+    """Gather the points used by cells and average the cell arrays to them.
+
+    Points are kept in their original order and every point takes the mean
+    over the cells using it, as threshold and cell_data_to_point_data do."""
+    lengths = offsets[cells + 1] - offsets[cells]
+    ends = np.cumsum(lengths)
+    idx = np.repeat(offsets[cells] - (ends - lengths), lengths) + np.arange(
+        ends[-1] if len(ends) else 0
+    )
+    point_ids, local = np.unique(connectivity[idx], return_inverse=True)
+    local = local.reshape(-1)
+    counts = np.bincount(local, minlength=len(point_ids))
+    owner = np.repeat(cells, lengths)
+    point_data = {}
+    for name, values in cell_arrays.items():
+        sums = np.zeros((len(point_ids),) + values.shape[1:])
+        np.add.at(sums, local, values[owner])
+        point_data[name] = sums / counts.reshape((-1,) + (1,) * (sums.ndim - 1))
+    return Panel(points[point_ids], point_data)
+
+
+def read_sections(
+    vtp_file,
+    rotate_z: float = 0.0,
+    arrays: Optional[Sequence[str]] = None,
+    airfoil_panels=AIRFOIL_PANELS,
+    te_panel: int = TE_PANEL,
+    web_panels: Optional[Dict[str, int]] = None,
+) -> Dict[int, Section]:
+    """Read every section of a VTP file in one pass.
+
+    The file is read and rotated once, its cells are grouped by section_id
+    with a single sort and every section is split into airfoil, trailing edge
+    and web panels on panel_id. Points are returned in 2D. arrays names the
+    cell arrays to average to the points, by default the ply thicknesses.
+    Returns the sections by id, in increasing order."""
+    import pyvista as pv
+
+    mesh = pv.read(vtp_file)
+    if rotate_z:
+        mesh = mesh.rotate_z(rotate_z)
+    for name in ("section_id", "panel_id"):
+        if name not in mesh.cell_data:
+            raise ValueError(f"{name} not found in VTP file")
+    if web_panels is None:
+        web_panels = WEB_PANELS
+    if arrays is None:
+        arrays = thickness_arrays(mesh.cell_data.keys())
+    grid = mesh.cast_to_unstructured_grid()
+    offsets = np.asarray(grid.cell_offsets)
+    connectivity = np.asarray(grid.cell_connectivity)
+    points = np.ascontiguousarray(np.asarray(grid.points)[:, :2], dtype=np.float64)
+    section_ids = np.asarray(grid.cell_data["section_id"])
+    panel_ids = np.asarray(grid.cell_data["panel_id"])
+    cell_arrays = {name: np.asarray(grid.cell_data[name]) for name in arrays}
+
+    order = np.argsort(section_ids, kind="stable")
+    ids, starts = np.unique(section_ids[order], return_index=True)
+    lo, hi = airfoil_panels
+    sections = {}
+    for section_id, cells in zip(ids.tolist(), np.split(order, starts[1:])):
+        panel = panel_ids[cells]
+        masks = {"airfoil": (panel >= lo) & (panel <= hi), "te": panel == te_panel}
+        masks.update({name: panel == pid for name, pid in web_panels.items()})
+        panels = {
+            name: _panel(cells[mask], offsets, connectivity, points, cell_arrays)
+            for name, mask in masks.items()
+        }
+        sections[int(section_id)] = Section(
+            section_id=int(section_id),
+            airfoil=panels["airfoil"],
+            te=panels["te"],
+            webs={name: panels[name] for name in web_panels},
+        )
+    return sections
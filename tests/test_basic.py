@@ -1,19 +1,44 @@
 """Basic tests for cgfoil."""
 
+import os
 import tempfile
 from unittest.mock import patch
 from CGAL.CGAL_Kernel import Point_2
 from CGAL.CGAL_Mesh_2 import Mesh_2_Constrained_Delaunay_triangulation_2
 from cgfoil.core.main import run_cgfoil, generate_mesh, plot_mesh
 from cgfoil.core.mesh import create_line_mesh
-from cgfoil.core.normals import compute_face_normals
-from cgfoil.core.offset import offset_airfoil
-from cgfoil.core.trim import adjust_endpoints, trim_self_intersecting_curve
-from cgfoil.models import Ply, Skin, Web, AirfoilMesh, Thickness
-from cgfoil.utils.geometry import point_in_polygon
+from cgfoil.core.normals import (
+    compute_face_normals,
+    get_material_id,
+    get_material_ids,
+)
+from cgfoil.core.offset import offset_airfoil, offset_skin_stack
+from cgfoil.core.triangulation import (
+    extract_triangulation,
+    insert_constraints,
+    loop_edges,
+)
+from cgfoil.core.trim import (
+    adjust_endpoints,
+    find_self_intersections,
+    trim_line,
+    trim_self_intersecting_curve,
+)
+from cgfoil.models import Ply, Skin, Web, AirfoilMesh, MeshResult, Thickness
+from cgfoil.utils.geometry import (
+    as_polyline,
+    intersect_polyline,
+    point_in_polygon,
+    points_in_polygon,
+    prepare_polygon,
+)
 from cgfoil.utils.io import load_airfoil
-from cgfoil.utils.plot import plot_triangulation
-from cgfoil.utils.summary import compute_cross_sectional_areas
+from cgfoil.utils.plot import max_thickness_at, plot_triangulation
+from cgfoil.utils.summary import (
+    compute_cross_sectional_areas,
+    face_areas,
+    sum_areas_by_material,
+)
 
 
 def test_import():
@@ -26,7 +51,7 @@ def test_models():
     thickness = Thickness(type="constant", value=0.1)
     assert thickness.compute(
         {"x": [0.5], "y": [0.5], "ta": [0.5], "tr": [0.5], "xr": [0.5]}
-    ) == [0.1]
+    ).tolist() == [0.1]
 
     thickness_array = Thickness(type="array", array=[0.1, 0.2, 0.3])
     assert thickness_array.compute(
@@ -37,7 +62,26 @@ def test_models():
             "tr": [0.0, 0.5, 1.0],
             "xr": [0.0, 0.5, 1.0],
         }
-    ) == [0.1, 0.2, 0.3]
+    ).tolist() == [0.1, 0.2, 0.3]
+
+    coords = {"x": [0.0, 0.5, 1.0], "y": [-0.1, 0.1, 0.1], "ta": [0.2]}
+    thickness_condition = Thickness(
+        type="condition",
+        value=0.2,
+        else_value=0.1,
+        conditions=[
+            {"coord": "y", "range": [0.0, 1.0]},
+            {"coord": "ta", "range": [0.0, 0.5]},
+        ],
+    )
+    # Missing entries of a short coordinate array read as 0.0
+    assert thickness_condition.compute(coords).tolist() == [0.1, 0.2, 0.2]
+    thickness_conditions = Thickness(
+        type="conditions",
+        else_value=0.1,
+        conditions=[{"max": 0.5, "value": 0.3}, {"min": 0.4, "value": 0.4}],
+    )
+    assert thickness_conditions.compute(coords).tolist() == [0.3, 0.3, 0.4]
 
     ply = Ply(thickness=thickness, material=1)
     assert ply.thickness.type == "constant"
@@ -67,25 +111,85 @@ def test_point_in_polygon():
     assert not point_in_polygon(point_outside, polygon)
 
 
+def test_points_in_polygon_matches_scalar():
+    import numpy as np
+
+    polygon = [
+        Point_2(0, 0),
+        Point_2(2, 0),
+        Point_2(2, 1),
+        Point_2(1, 2),
+        Point_2(0, 1),
+    ]
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-0.5, 2.5, size=(200, 2))
+    # Include points on vertices and edges, the ray caster is sensitive there
+    points = np.vstack([points, [[0, 0], [2, 0.5], [1, 2], [0.5, 1.5], [1, 0]]])
+    expected = [point_in_polygon(Point_2(x, y), polygon) for x, y in points]
+    assert points_in_polygon(points, polygon).tolist() == expected
+
+
+def test_get_material_ids_matches_per_point():
+    import numpy as np
+
+    def square(h):
+        return [Point_2(-h, -h), Point_2(h, -h), Point_2(h, h), Point_2(-h, h)]
+
+    outer_points = square(1.0)
+    inner_list = [square(0.8), square(0.6)]
+    line_ply_list = [
+        [Point_2(-0.1, -0.9), Point_2(0.1, -0.9), Point_2(0.1, 0.9), Point_2(-0.1, 0.9)]
+    ]
+    rng = np.random.default_rng(1)
+    centroids = rng.uniform(-1.2, 1.2, size=(300, 2))
+    for skin_material_ids in ([4, 5], [4], []):
+        material_ids, is_skin, layer_index = get_material_ids(
+            centroids, outer_points, inner_list, line_ply_list, [7], skin_material_ids
+        )
+        for i, (x, y) in enumerate(centroids):
+            expected = get_material_id(
+                Point_2(x, y),
+                outer_points,
+                inner_list,
+                line_ply_list,
+                [7],
+                skin_material_ids,
+            )
+            assert (material_ids[i], is_skin[i], layer_index[i]) == expected
+
+
 def test_create_line_mesh():
     p1 = Point_2(0, 0)
     p2 = Point_2(1, 0)
     points = create_line_mesh(p1, p2, 3)
-    assert len(points) == 4  # p1, two intermediates, p2
-    assert points[0].x() == 0
-    assert points[0].y() == 0
-    assert points[-1].x() == 1
-    assert points[-1].y() == 0
+    assert points.shape == (4, 2)  # p1, two intermediates, p2
+    assert points[0].tolist() == [0, 0]
+    assert points[-1].tolist() == [1, 0]
 
 
 def test_offset_airfoil():
     points = [Point_2(0, 0), Point_2(1, 0), Point_2(1, 1), Point_2(0, 1)]
     offset = offset_airfoil(points, 0.1)
-    assert len(offset) == 4
+    assert offset.shape == (4, 2)
     # Check that points are offset outward
     # For simplicity, just check length
 
 
+def test_offset_skin_stack():
+    import numpy as np
+
+    angles = np.linspace(0, 2 * np.pi, 40, endpoint=False)
+    outer = np.column_stack((np.cos(angles), 0.2 * np.sin(angles)))
+    thicknesses = [0.01, np.linspace(0.0, 0.02, 40), 0.005]
+    loops, normals, tangents = offset_skin_stack(outer, thicknesses)
+    current = outer
+    for loop, thickness in zip(loops, thicknesses):
+        current = offset_airfoil(current, thickness)
+        np.testing.assert_array_equal(loop, current)
+    np.testing.assert_allclose(np.hypot(*tangents.T), 1.0)
+    np.testing.assert_allclose(np.sum(normals * tangents, axis=1), 0.0, atol=1e-15)
+
+
 def test_load_airfoil(tmp_path):
     dat_content = """1
 
@@ -95,21 +199,54 @@ def test_load_airfoil(tmp_path):
     file = tmp_path / "test.dat"
     file.write_text(dat_content)
     points = load_airfoil(str(file))
-    assert len(points) == 2
-    assert points[0].x() == 0.0
-    assert points[0].y() == 0.0
-    assert points[1].x() == 1.0
-    assert points[1].y() == 0.1
+    assert points.shape == (2, 2)
+    assert points.tolist() == [[0.0, 0.0], [1.0, 0.1]]
+
+
+def test_read_airfoil_file_cache(tmp_path):
+    import os
+    from cgfoil.utils.io import (
+        clear_airfoil_cache,
+        read_airfoil_file,
+        set_airfoil_cache_limit,
+    )
+
+    file = tmp_path / "test.dat"
+    file.write_text("header\n0.0 0.0\n1.0 0.1\n0.5 extra 3\n")
+    clear_airfoil_cache()
+    points = read_airfoil_file(str(file))
+    assert points.tolist() == [[0.0, 0.0], [1.0, 0.1]]
+    assert not points.flags.writeable
+    assert read_airfoil_file(str(file)) is points
+    # A changed file is parsed again
+    file.write_text("header\n0.0 0.0\n1.0 0.1\n2.0 0.2\n")
+    os.utime(file, ns=(0, 0))
+    assert read_airfoil_file(str(file)).shape == (3, 2)
+    set_airfoil_cache_limit(0)
+    assert read_airfoil_file(str(file)) is not read_airfoil_file(str(file))
+    set_airfoil_cache_limit(64)
+
+
+def test_resample_points_fits_once():
+    import numpy as np
+    from cgfoil.utils import io
+
+    t = np.linspace(0, np.pi, 40)
+    points = np.column_stack((np.cos(t), np.sin(t)))
+    io._pchip_cache.clear()
+    coarse = load_airfoil(points, 20)
+    fine = load_airfoil(points, 80)
+    assert len(io._pchip_cache) == 1
+    assert coarse.shape == (20, 2) and fine.shape == (80, 2)
+    np.testing.assert_allclose(fine[[0, -1]], points[[0, -1]], atol=1e-12)
+    np.testing.assert_allclose(np.hypot(fine[:, 0], fine[:, 1]), 1.0, atol=1e-3)
 
 
 def test_load_airfoil_list():
     points_list = [(0.0, 0.0), (1.0, 0.1)]
     points = load_airfoil(points_list)
-    assert len(points) == 2
-    assert points[0].x() == 0.0
-    assert points[0].y() == 0.0
-    assert points[1].x() == 1.0
-    assert points[1].y() == 0.1
+    assert points.shape == (2, 2)
+    assert points.tolist() == [[0.0, 0.0], [1.0, 0.1]]
 
 
 def test_load_airfoil_numpy():
@@ -117,11 +254,8 @@ def test_load_airfoil_numpy():
 
     points_array = np.array([[0.0, 0.0], [1.0, 0.1]])
     points = load_airfoil(points_array)
-    assert len(points) == 2
-    assert points[0].x() == 0.0
-    assert points[0].y() == 0.0
-    assert points[1].x() == 1.0
-    assert points[1].y() == 0.1
+    assert points.shape == (2, 2)
+    assert points.tolist() == [[0.0, 0.0], [1.0, 0.1]]
 
 
 def test_adjust_endpoints():
@@ -129,18 +263,77 @@ def test_adjust_endpoints():
     adjusted = adjust_endpoints(points, 0.1)
     assert len(adjusted) == 3
     # Check that endpoints are adjusted
-    assert adjusted[0].x() < 0  # moved backward
-    assert adjusted[-1].x() > 2  # moved forward
+    assert adjusted[0, 0] < 0  # moved backward
+    assert adjusted[-1, 0] > 2  # moved forward
+    # The input points are left untouched
+    assert points[0].x() == 0
 
 
 def test_trim_self_intersecting_curve():
     # Create points that form a self-intersecting curve
     points = [Point_2(0, 0), Point_2(1, 1), Point_2(1, 0), Point_2(0, 1)]
     trimmed = trim_self_intersecting_curve(points)
-    assert isinstance(trimmed, list)
+    assert trimmed.ndim == 2 and trimmed.shape[1] == 2
     # Depending on intersection, it may trim
 
 
+def test_find_self_intersections_prunes_pairs():
+    import math
+    from CGAL.CGAL_Kernel import Segment_2, do_intersect
+
+    # Offset-like loop whose ends cross each other near the start
+    n = 200
+    points = [
+        Point_2(
+            math.cos(2 * math.pi * i / (n - 10)), math.sin(2 * math.pi * i / (n - 10))
+        )
+        for i in range(n)
+    ]
+    expected = set()
+    for i in range(n - 1):
+        for j in range(i + 2, n - 1):
+            seg1 = Segment_2(points[i], points[i + 1])
+            seg2 = Segment_2(points[j], points[j + 1])
+            if do_intersect(seg1, seg2):
+                expected.update((i, j))
+    intersecting, n_tested = find_self_intersections(points)
+    assert intersecting == expected
+    assert n_tested < (n - 2) * (n - 3) // 10
+
+
+def test_intersect_polyline():
+    loop = prepare_polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+    line = [(0.5, -1.0), (0.5, 0.5), (0.5, 2.0)]
+    inter_points, seg_idx, t = intersect_polyline(line, loop)
+    assert inter_points.tolist() == [[0.5, 0.0], [0.5, 1.0]]
+    assert seg_idx.tolist() == [0, 1]
+    assert t.tolist() == [2 / 3, 1 / 3]
+
+
+def test_as_polyline_rejects_bad_shapes():
+    import pytest
+
+    square = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    assert as_polyline(square).shape == (4, 2)
+    assert as_polyline([]).shape == (0, 2)
+    # (4, 3) points have an even element count but are not (x, y) pairs
+    points_3d = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+    for bad in (points_3d, [0.0, 1.0, 2.0, 3.0], [[[0, 0], [1, 1]]]):
+        with pytest.raises(ValueError, match=r"shape \(n, 2\)"):
+            as_polyline(bad)
+    with pytest.raises(ValueError):
+        load_airfoil(points_3d)
+
+
+def test_trim_line():
+    loop = prepare_polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+    line = [Point_2(0.5, -1.0 + 0.5 * i) for i in range(7)]
+    trimmed = trim_line(line, loop)
+    assert trimmed.tolist() == [[0.5, 0.0], [0.5, 0.5], [0.5, 1.0]]
+    # Lines that do not cross the loop twice are left untouched
+    assert trim_line(line[:2], loop).tolist() == [[0.5, -1.0], [0.5, -0.5]]
+
+
 def test_compute_face_normals():
     cdt = Mesh_2_Constrained_Delaunay_triangulation_2()
     cdt.insert_constraint(Point_2(0, 0), Point_2(1, 0))
@@ -170,6 +363,155 @@ def test_compute_face_normals():
     assert len(face_inplanes) == cdt.number_of_faces()
 
 
+def test_compute_face_normals_with_tree():
+    from scipy.spatial import cKDTree
+
+    cdt = Mesh_2_Constrained_Delaunay_triangulation_2()
+    outer_points = [Point_2(0, 0), Point_2(1, 0), Point_2(1, 1), Point_2(0, 1)]
+    for i in range(4):
+        cdt.insert_constraint(outer_points[i], outer_points[(i + 1) % 4])
+    cdt.insert(Point_2(0.3, 0.6))
+    outer_normals = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+    outer_tangents = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+    args = (cdt, outer_points, [], [], [], [0], outer_normals, [], outer_tangents)
+    face_normals, _, face_inplanes = compute_face_normals(*args)
+    tree = cKDTree([(p.x(), p.y()) for p in outer_points])
+    assert compute_face_normals(*args, outer_tree=tree) == (
+        face_normals,
+        [0] * cdt.number_of_faces(),
+        face_inplanes,
+    )
+    for face, normal in zip(cdt.finite_faces(), face_normals):
+        cx = sum(face.vertex(k).point().x() for k in range(3)) / 3.0
+        cy = sum(face.vertex(k).point().y() for k in range(3)) / 3.0
+        closest = min(
+            range(4),
+            key=lambda j: (
+                (outer_points[j].x() - cx) ** 2 + (outer_points[j].y() - cy) ** 2
+            ),
+        )
+        assert normal == outer_normals[closest]
+
+
+def test_insert_constraints_shares_edges():
+    import numpy as np
+
+    # Two adjacent plies sharing the line x == 1
+    ply1 = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=float)
+    ply2 = np.array([(1, 0), (2, 0), (2, 1), (1, 1)], dtype=float)
+    points, edges = loop_edges([ply1, ply2])
+    assert len(points) == 6
+    assert len(edges) == 7
+    cdt = Mesh_2_Constrained_Delaunay_triangulation_2()
+    assert insert_constraints(cdt, [ply1, ply2]) == (6, 7)
+    assert cdt.number_of_vertices() == 6
+    constrained = sum(cdt.is_constrained(e) for e in cdt.finite_edges())
+    assert constrained == 7
+
+
+def test_extract_triangulation():
+    import numpy as np
+
+    ply1 = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=float)
+    ply2 = np.array([(1, 0), (2, 0), (2, 1), (1, 1)], dtype=float)
+    cdt = Mesh_2_Constrained_Delaunay_triangulation_2()
+    insert_constraints(cdt, [ply1, ply2])
+    vertices, faces, constrained = extract_triangulation(cdt, constrained_edges=True)
+    assert vertices.shape == (6, 2)
+    assert faces.shape == (cdt.number_of_faces(), 3)
+    assert faces.dtype == np.int32
+    for face, row in zip(cdt.finite_faces(), faces):
+        for k in range(3):
+            p = face.vertex(k).point()
+            assert tuple(vertices[row[k]]) == (p.x(), p.y())
+    # Each constrained edge is seen from one or two faces
+    assert 7 <= constrained.sum() <= 14
+    areas = face_areas(vertices, faces)
+    assert np.isclose(areas.sum(), 2.0)
+    material_ids = np.array([1, -1, 0, 1])[: len(faces)]
+    totals = sum_areas_by_material(areas, material_ids)
+    assert list(totals) == [1, 0]
+    assert np.isclose(totals[1], areas[material_ids == 1].sum())
+
+
+def test_mesh_result_arrays():
+    import numpy as np
+    import pytest
+
+    vertices = np.array([(0, 0), (1, 0), (0, 1), (1, 1)], dtype=float)
+    faces = np.array([(0, 1, 2), (1, 3, 2)], dtype=np.int32)
+    fields = dict(
+        outer_points=vertices,
+        inner_list=[],
+        line_ply_list=[],
+        untrimmed_lines=[],
+        web_material_ids=[],
+        skin_material_ids=[0],
+        web_names=[],
+        face_normals=np.zeros((2, 2)),
+        face_material_ids=[0, 0],
+        face_inplanes=np.zeros((2, 2)),
+        areas={0: 1.0},
+        skin_ply_thicknesses=[[0.1, 0.1, 0.1, 0.1]],
+        web_ply_thicknesses=[],
+    )
+    result = MeshResult(vertices=vertices, faces=faces, **fields)
+    assert result.vertices is vertices
+    assert result.faces is faces
+    assert result.face_material_ids.dtype == np.int32
+    # The legacy list layout is converted and restored by as_lists
+    legacy = MeshResult(
+        vertices=[[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]],
+        faces=[[3, 0, 1, 2], [3, 1, 3, 2]],
+        **fields,
+    )
+    np.testing.assert_array_equal(legacy.vertices, vertices)
+    np.testing.assert_array_equal(legacy.faces, faces)
+    lists = legacy.as_lists()
+    assert lists.vertices[3] == [1.0, 1.0, 0.0]
+    assert lists.faces == [[3, 0, 1, 2], [3, 1, 3, 2]]
+    assert lists.outer_points[1] == (1.0, 0.0)
+    with pytest.raises(ValueError, match="faces"):
+        MeshResult(vertices=vertices, faces=[[0, 1]], **fields)
+
+
+def test_evaluate_thickness_cache():
+    import numpy as np
+    from cgfoil.core.thickness import clear_thickness_cache, evaluate_thickness
+
+    clear_thickness_cache()
+    thickness = Thickness(type="interp", coord="tr", x=[0, 1], y=[0.1, 0.2])
+    assert thickness.compile() is Thickness(**thickness.model_dump()).compile()
+    coords = {"x": np.linspace(0, 1, 5), "tr": np.linspace(0, 1, 5)}
+    result = evaluate_thickness(thickness, coords)
+    np.testing.assert_array_equal(result, thickness.compute(coords))
+    assert not result.flags.writeable
+    # Only the coordinates the definition reads are part of the key
+    assert evaluate_thickness(thickness, {**coords, "x": np.zeros(5)}) is result
+    assert evaluate_thickness(thickness, {"tr": np.linspace(0, 1, 6)}) is not result
+    thickness.y = [0.1, 0.3]
+    assert evaluate_thickness(thickness, coords)[-1] == 0.3
+
+
+def test_evaluate_thickness_cache_threads(monkeypatch):
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+    from cgfoil.core import thickness as thickness_module
+
+    # A tiny cache makes threads evict each other's entries all the time
+    monkeypatch.setattr(thickness_module, "_CACHE_SIZE", 2)
+    thickness = Thickness(type="interp", coord="x", x=[0, 1], y=[0.1, 0.2])
+
+    def evaluate(i):
+        x = np.linspace(0, 1, 3 + i % 7)
+        for _ in range(200):
+            result = thickness_module.evaluate_thickness(thickness, {"x": x})
+        return result.tolist() == np.interp(x, [0, 1], [0.1, 0.2]).tolist()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(evaluate, range(32)))
+
+
 def test_compute_cross_sectional_areas():
     cdt = Mesh_2_Constrained_Delaunay_triangulation_2()
     cdt.insert_constraint(Point_2(0, 0), Point_2(1, 0))
@@ -211,28 +553,74 @@ def test_plot_triangulation():
         v1 = vertex_map[face.vertex(1)]
         v2 = vertex_map[face.vertex(2)]
         faces.append([3, v0, v1, v2])
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+
+    # Record the artists of the figure as it is saved
+    drawn = []
+    savefig = Figure.savefig
+
+    def recording_savefig(fig, *args, **kwargs):
+        ax = fig.axes[0]
+        fills = [c for c in ax.collections if type(c) is PolyCollection]
+        drawn.append((list(ax.patches), fills))
+        return savefig(fig, *args, **kwargs)
+
     with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
         plot_filename = f.name
-    plot_triangulation(
-        vertices,
-        faces,
-        outer_points,
-        inner_list,
-        line_ply_list,
-        untrimmed_lines,
-        web_material_ids,
-        skin_material_ids,
-        web_names,
-        face_normals,
-        face_material_ids,
-        face_inplanes,
-        split_view=False,
-        plot_filename=plot_filename,
-    )
+    with patch.object(Figure, "savefig", recording_savefig):
+        plot_triangulation(
+            vertices,
+            faces,
+            outer_points,
+            inner_list,
+            line_ply_list,
+            untrimmed_lines,
+            web_material_ids,
+            skin_material_ids,
+            web_names,
+            face_normals,
+            face_material_ids,
+            face_inplanes,
+            split_view=False,
+            plot_filename=plot_filename,
+        )
     import os
 
     assert os.path.exists(plot_filename)
     os.unlink(plot_filename)
+    # Faces are drawn as one collection, not one patch per face
+    ((patches, fills),) = drawn
+    assert not patches
+    assert len(fills) == 1
+    assert len(fills[0].get_paths()) == len(faces)
+
+
+def test_max_thickness_at_matches_reference():
+    import numpy as np
+    from collections import defaultdict
+
+    def reference(points):
+        x_to_ys = defaultdict(list)
+        for x, y in points:
+            x_to_ys[round(x, 4)].append(y)
+        best, best_x = 0, 0
+        for x, ys in x_to_ys.items():
+            if max(ys) - min(ys) > best:
+                best, best_x = max(ys) - min(ys), x
+        return best_x, best
+
+    rng = np.random.default_rng(2)
+    # Few distinct x and y values, so several x tie on the largest extent
+    points = np.column_stack(
+        (rng.integers(0, 8, 60) / 8, rng.integers(0, 3, 60) / 2)
+    ).tolist()
+    assert max_thickness_at(points) == reference(points)
+    outline = load_airfoil(
+        os.path.join(os.path.dirname(__file__), "naca0018.dat"), 200
+    ).tolist()
+    assert max_thickness_at(outline) == reference(outline)
+    assert max_thickness_at([(0.5, 0.1)]) == (0, 0)
 
 
 def test_plot_mesh():
@@ -260,8 +648,9 @@ def test_plot_mesh():
     os.unlink(plot_filename)
 
 
-@patch("matplotlib.pyplot.savefig")
-def test_run_cgfoil(mock_savefig):
+def test_run_cgfoil():
+    import matplotlib.pyplot as plt
+
     with tempfile.NamedTemporaryFile(mode="w", suffix=".dat", delete=False) as f:
         f.write("1\n\n0.0 0.0\n1.0 0.1\n")
         fname = f.name
@@ -275,8 +664,168 @@ def test_run_cgfoil(mock_savefig):
         plot=True,
         plot_filename="test.png",
     )
-    run_cgfoil(mesh)
+    n_figures = len(plt.get_fignums())
+    with patch("matplotlib.figure.Figure.savefig") as mock_savefig:
+        run_cgfoil(mesh)
     mock_savefig.assert_called_once_with("test.png")
+    # Saved plots do not go through pyplot
+    assert len(plt.get_fignums()) == n_figures
+
+
+def test_plot_mesh_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    fname = os.path.join(os.path.dirname(__file__), "naca0018.dat")
+    skins = {
+        "skin": Skin(
+            thickness=Thickness(type="constant", value=0.005), material=1, sort_index=1
+        )
+    }
+    mesh_result = generate_mesh(AirfoilMesh(skins=skins, webs={}, airfoil_input=fname))
+    files = [str(tmp_path / f"plot_{i}.png") for i in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda f: plot_mesh(mesh_result, f, False), files))
+    sizes = {os.path.getsize(f) for f in files}
+    assert len(sizes) == 1 and sizes.pop() > 0
+
+
+def test_generate_meshes():
+    from cgfoil.core.batch import generate_meshes
+    from cgfoil.models import BatchReport
+
+    fname = os.path.join(os.path.dirname(__file__), "naca0018.dat")
+    skins = {
+        "skin": Skin(
+            thickness=Thickness(type="constant", value=0.005), material=1, sort_index=1
+        )
+    }
+    meshes = {
+        "good": AirfoilMesh(skins=skins, webs={}, airfoil_input=fname),
+        "bad": AirfoilMesh(skins=skins, webs={}, airfoil_input=fname + ".missing"),
+    }
+    for jobs in [1, 2]:
+        report = BatchReport()
+        results = dict(generate_meshes(meshes, jobs=jobs, report=report))
+        assert list(results) == ["good"]
+        assert len(results["good"].faces) > 0
+        assert report.n_tasks == 2
+        assert report.succeeded == ["good"]
+        assert [e.name for e in report.errors] == ["bad"]
+        assert report.errors[0].error_type == "FileNotFoundError"
+    # Stopping early cancels the pending tasks and shuts the pool down
+    many = {str(i): meshes["good"] for i in range(6)}
+    results = generate_meshes(many, jobs=2)
+    name, _ = next(results)
+    results.close()
+    assert name in many
+
+
+def test_mesh_cache(tmp_path):
+    import numpy as np
+    from cgfoil.core.cache import MeshCache, cached_generate_mesh, mesh_key
+
+    fname = os.path.join(os.path.dirname(__file__), "naca0018.dat")
+
+    def make_mesh(value=0.005, airfoil_input=fname, **kwargs):
+        skins = {
+            "skin": Skin(
+                thickness=Thickness(type="constant", value=value),
+                material=1,
+                sort_index=1,
+            )
+        }
+        return AirfoilMesh(skins=skins, webs={}, airfoil_input=airfoil_input, **kwargs)
+
+    key = mesh_key(make_mesh())
+    assert mesh_key(make_mesh(vtk="out.vtk", plot=True)) == key
+    assert mesh_key(make_mesh(value=0.006)) != key
+    assert mesh_key(make_mesh(scale_factor=2.0)) != key
+    points = load_airfoil(fname)
+    assert mesh_key(make_mesh(airfoil_input=points)) == key
+
+    cache_dir = str(tmp_path / "cache")
+    first = cached_generate_mesh(make_mesh(), cache_dir)
+    with patch("cgfoil.core.cache.generate_mesh") as mock_generate:
+        second = cached_generate_mesh(make_mesh(), cache_dir)
+    mock_generate.assert_not_called()
+    np.testing.assert_array_equal(first.vertices, second.vertices)
+    np.testing.assert_array_equal(first.faces, second.faces)
+    assert first.areas == second.areas
+
+    # A cache smaller than two entries keeps only the latest
+    cache = MeshCache(cache_dir)
+    cache.max_bytes = os.path.getsize(cache.path(key)) + 1
+    cache.put("other", first)
+    assert [os.path.basename(p) for _, _, p in cache.entries()] == ["other.cgfmesh"]
+    assert cache.get(key) is None
+
+
+def test_generate_mesh_does_not_mutate():
+    import numpy as np
+    from cgfoil.core.plan import compile_mesh
+
+    fname = os.path.join(os.path.dirname(__file__), "naca0018.dat")
+    mesh = AirfoilMesh(
+        skins={
+            "skin": Skin(
+                thickness=Thickness(type="constant", value=0.005),
+                material="glass",
+                sort_index=1,
+            )
+        },
+        webs={
+            "web": Web(
+                points=[(0.3, -0.2), (0.3, 0.2)],
+                plies=[
+                    Ply(
+                        thickness=Thickness(type="constant", value=0.004),
+                        material="foam",
+                    )
+                ],
+                normal_ref=[1, 0],
+            )
+        },
+        airfoil_input=fname,
+        materials=[{"name": "glass"}, {"name": "foam"}],
+        scale_factor=2.0,
+    )
+    before = mesh.model_dump()
+    first = generate_mesh(mesh)
+    second = generate_mesh(mesh)
+    assert mesh.model_dump() == before
+    assert first.skin_material_ids == [0]
+    assert first.web_material_ids == [1]
+    np.testing.assert_array_equal(first.untrimmed_lines[0][0], [0.6, -0.4])
+    np.testing.assert_array_equal(first.vertices, second.vertices)
+    np.testing.assert_array_equal(first.faces, second.faces)
+
+    plan = compile_mesh(mesh)
+    assert not plan.outer_points.flags.writeable
+    third = generate_mesh(plan)
+    np.testing.assert_array_equal(first.faces, third.faces)
+    assert generate_mesh(plan).areas == third.areas
+
+
+def test_generate_mesh_profile():
+    from cgfoil.utils.profile import profiling
+
+    fname = os.path.join(os.path.dirname(__file__), "naca0018.dat")
+    skins = {
+        "skin": Skin(
+            thickness=Thickness(type="constant", value=0.005), material=1, sort_index=1
+        )
+    }
+    mesh = AirfoilMesh(skins=skins, webs={}, airfoil_input=fname)
+    assert generate_mesh(mesh).profile is None
+    with profiling() as profile:
+        result = generate_mesh(mesh)
+    for name in ["load", "thickness", "offset", "trim", "cdt_insert", "classify"]:
+        assert profile.stages[name]["calls"] >= 1
+    counters = result.profile["counters"]
+    assert counters["outer_points"] == len(result.outer_points)
+    assert counters["cdt_vertices"] == len(result.vertices)
+    assert counters["faces"] == len(result.faces)
+    assert counters["self_intersection_tests"] >= 0
 
 
 def test_run_examples():
@@ -1,12 +1,17 @@
 """CLI tests for cgfoil."""
 
+import json
 import subprocess
 import os
 import tempfile
 import shutil
+import sys
 from pathlib import Path
 import yaml
 
+# Import time budget of cgfoil.cli.cli in microseconds, most of it treeparse
+CLI_IMPORT_BUDGET_US = 1_000_000
+
 
 def test_cli_help():
     result = subprocess.run(["cgfoil", "--help"], capture_output=True, text=True)
@@ -14,6 +19,28 @@ def test_cli_help():
     assert "CGAL-based airfoil meshing tool" in result.stdout
 
 
+def test_cli_import_time():
+    """Importing the CLI must not load the meshing or plotting stack."""
+    code = (
+        "import sys, cgfoil.cli.cli; "
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in "
+        "('numpy', 'scipy', 'matplotlib', 'pandas', 'CGAL', 'pyvista')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert result.stdout.strip() == "[]"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and parts[1].strip().isdigit():
+            cumulative[parts[2].strip()] = int(parts[1])
+    assert cumulative["cgfoil.cli.cli"] < CLI_IMPORT_BUDGET_US
+
+
 def test_cli_invalid_command():
     result = subprocess.run(["cgfoil", "invalid"], capture_output=True, text=True)
     assert result.returncode != 0
@@ -80,6 +107,17 @@ def test_cli_plot():
         )
         assert result_plot.returncode == 0
         assert plot_file.exists()
+        # Plotting a stored mesh works from its arrays and does not load CGAL
+        code = (
+            "import sys; from cgfoil.cli.plot import plot_existing_mesh; "
+            f"plot_existing_mesh({str(mesh_file)!r}, {str(plot_file)!r}); "
+            "print(sorted(m for m in sys.modules if m.startswith('CGAL')))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True
+        )
+        assert result.returncode == 0
+        assert result.stdout.strip().splitlines()[-1] == "[]"
 
 
 def test_cli_export_vtk():
@@ -167,7 +205,7 @@ def test_cli_full():
         assert result.returncode == 0
         assert os.path.exists(os.path.join(tmpdir, "mesh.pck"))
         assert os.path.exists(os.path.join(tmpdir, "plot.png"))
-        assert os.path.exists(os.path.join(tmpdir, "mesh.vtk"))
+        assert os.path.exists(os.path.join(tmpdir, "mesh.vtu"))
         assert os.path.exists(os.path.join(tmpdir, "mesh.json"))
         assert os.path.exists(os.path.join(tmpdir, "summary.csv"))
 
@@ -177,3 +215,96 @@ def test_cli_full_invalid_yaml():
         ["cgfoil", "full", "nonexistent.yaml", "/tmp"], capture_output=True, text=True
     )
     assert result.returncode != 0
+
+
+def test_cli_batch():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(Path(__file__).parent / "airfoil_mesh.yaml", "r") as f:
+            data = yaml.safe_load(f)
+        data["airfoil_input"] = str(Path(__file__).parent / "naca0018.dat")
+        input_dir = Path(tmpdir) / "sections"
+        input_dir.mkdir()
+        for n_elem in [100, 150]:
+            data["n_elem"] = n_elem
+            with open(input_dir / f"section_{n_elem}.yaml", "w") as f:
+                yaml.dump(data, f)
+        data["airfoil_input"] = str(Path(tmpdir) / "missing.dat")
+        with open(input_dir / "broken.yaml", "w") as f:
+            yaml.dump(data, f)
+        output_dir = Path(tmpdir) / "out"
+        result = subprocess.run(
+            ["cgfoil", "batch", str(input_dir), "-o", str(output_dir), "-n", "2"]
+            + ["--plot", "true"],
+            capture_output=True,
+            text=True,
+        )
+        # The broken section fails the run without stopping the others
+        assert result.returncode != 0
+        assert (output_dir / "section_100.pck").exists()
+        assert (output_dir / "section_150.pck").exists()
+        assert (output_dir / "section_100.png").exists()
+        with open(output_dir / "batch_report.json") as f:
+            report = json.load(f)
+        assert report["n_tasks"] == 3
+        assert sorted(report["succeeded"]) == ["section_100", "section_150"]
+        assert [e["name"] for e in report["errors"]] == ["broken"]
+        assert report["errors"][0]["error_type"] == "FileNotFoundError"
+
+
+def test_cli_mesh_cache():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(Path(__file__).parent / "airfoil_mesh.yaml", "r") as f:
+            data = yaml.safe_load(f)
+        data["airfoil_input"] = str(Path(__file__).parent / "naca0018.dat")
+        yaml_file = Path(tmpdir) / "test.yaml"
+        with open(yaml_file, "w") as f:
+            yaml.dump(data, f)
+        cache_dir = Path(tmpdir) / "cache"
+        outputs = []
+        for i, flags in enumerate([[], [], ["--no-cache"]]):
+            out_file = Path(tmpdir) / f"mesh_{i}.pck"
+            result = subprocess.run(
+                ["cgfoil", "mesh", str(yaml_file), "-o", str(out_file)]
+                + ["--cache-dir", str(cache_dir)]
+                + flags,
+                capture_output=True,
+                text=True,
+            )
+            assert result.returncode == 0
+            outputs.append(out_file.read_bytes())
+            assert len(list(cache_dir.glob("*.cgfmesh"))) == 1
+        assert outputs[0] == outputs[1] == outputs[2]
+
+
+def test_cli_mesh_profile():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(Path(__file__).parent / "airfoil_mesh.yaml", "r") as f:
+            data = yaml.safe_load(f)
+        data["airfoil_input"] = str(Path(__file__).parent / "naca0018.dat")
+        yaml_file = Path(tmpdir) / "test.yaml"
+        with open(yaml_file, "w") as f:
+            yaml.dump(data, f)
+        profile_file = Path(tmpdir) / "profile.json"
+        result = subprocess.run(
+            ["cgfoil", "mesh", str(yaml_file), "-o", str(Path(tmpdir) / "m.pck")]
+            + ["--profile", str(profile_file)],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        with open(profile_file) as f:
+            profile = json.load(f)
+        assert "cdt_insert" in profile["stages"]
+        assert "save_mesh" in profile["stages"]
+        assert profile["counters"]["cdt_faces"] >= profile["counters"]["faces"] > 0
+        # With "-" stdout holds only the report, log lines go to stderr
+        result = subprocess.run(
+            ["cgfoil", "mesh", str(yaml_file), "-o", str(Path(tmpdir) / "m.pck")]
+            + ["--cache-dir", str(Path(tmpdir) / "cache"), "--profile", "-"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        profile = json.loads(result.stdout)
+        assert profile["counters"]["cache_misses"] == 1
+        assert "Mesh cached as" in result.stderr
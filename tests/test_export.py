@@ -12,6 +12,7 @@ from cgfoil.models import AirfoilMesh
 from cgfoil.core.main import generate_mesh
 from cgfoil.cli.cli import export_mesh_to_vtk, export_mesh_to_anba, summarize_mesh
 from cgfoil.utils.plot import plot_triangulation
+from cgfoil.utils.meshio import MeshFile, load_mesh, save_mesh
 
 
 @pytest.fixture
@@ -23,12 +24,8 @@ def mesh_result_fixture():
         mesh = AirfoilMesh(**data)
         mesh.airfoil_input = str(Path(__file__).parent / "naca0018.dat")
         mesh_result = generate_mesh(mesh)
-        # Save to pickle
-        import pickle
-
         mesh_file = os.path.join(tmpdir, "mesh.pck")
-        with open(mesh_file, "wb") as f:
-            pickle.dump(mesh_result, f)
+        save_mesh(mesh_result, mesh_file)
         yield tmpdir, mesh_result
 
 
@@ -53,6 +50,24 @@ def test_export_vtk_loadable(mesh_result_fixture):
     assert len(mesh.cell_data["material_id"]) == len(mesh_result.face_material_ids)
 
 
+def test_export_vtu_compressed(mesh_result_fixture):
+    tmpdir, mesh_result = mesh_result_fixture
+    vtk_file = export_mesh_to_vtk(
+        os.path.join(tmpdir, "mesh.pck"), os.path.join(tmpdir, "test")
+    )
+    assert vtk_file == os.path.join(tmpdir, "test.vtu")
+    with open(vtk_file, "rb") as f:
+        assert b"vtkZLibDataCompressor" in f.read(1000)
+    import numpy as np
+    import pyvista as pv
+
+    mesh = pv.read(vtk_file)
+    np.testing.assert_array_equal(
+        mesh.cell_data["material_id"], mesh_result.face_material_ids
+    )
+    np.testing.assert_allclose(mesh.cell_data["Area"], mesh_result.face_areas)
+
+
 def test_export_anba(mesh_result_fixture):
     tmpdir, mesh_result = mesh_result_fixture
     anba_file = os.path.join(tmpdir, "test.json")
@@ -116,6 +131,46 @@ def test_export_summary(mesh_result_fixture):
     assert "Total" in content
 
 
+def test_save_load_mesh(mesh_result_fixture):
+    import numpy as np
+
+    tmpdir, mesh_result = mesh_result_fixture
+    mesh_file = os.path.join(tmpdir, "mesh.cgm")
+    save_mesh(mesh_result, mesh_file)
+    mesh = MeshFile(mesh_file)
+    assert mesh.areas == mesh_result.areas
+    faces = mesh.array("faces")
+    assert isinstance(faces, np.memmap)
+    np.testing.assert_array_equal(faces, mesh_result.faces)
+    loaded = load_mesh(mesh_file)
+    for name in ["vertices", "face_material_ids", "face_normals", "face_areas"]:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(mesh_result, name))
+    assert len(loaded.line_ply_list) == len(mesh_result.line_ply_list)
+    for a, b in zip(loaded.line_ply_list, mesh_result.line_ply_list):
+        np.testing.assert_array_equal(a, b)
+    assert loaded.web_names == mesh_result.web_names
+    assert loaded.materials == mesh_result.materials
+    # Legacy pickles are only read on request, or converted once
+    import pickle
+    from cgfoil.cli.convert import convert_mesh
+
+    legacy_file = os.path.join(tmpdir, "legacy.pck")
+    with open(legacy_file, "wb") as f:
+        pickle.dump(mesh_result, f)
+    with pytest.raises(ValueError, match="cgfoil convert"):
+        load_mesh(legacy_file)
+    legacy = load_mesh(legacy_file, allow_pickle=True)
+    np.testing.assert_array_equal(legacy.faces, mesh_result.faces)
+    converted_file = os.path.join(tmpdir, "converted.cgm")
+    convert_mesh(legacy_file, converted_file)
+    converted = load_mesh(converted_file)
+    np.testing.assert_array_equal(converted.faces, mesh_result.faces)
+    summary_file = os.path.join(tmpdir, "summary.csv")
+    summarize_mesh(mesh_file, output=summary_file)
+    with open(summary_file) as f:
+        assert "Total" in f.read()
+
+
 def test_plot_triangulation_to_file(tmp_path):
     cdt = Mesh_2_Constrained_Delaunay_triangulation_2()
     cdt.insert_constraint(Point_2(0, 0), Point_2(1, 0))
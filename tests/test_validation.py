@@ -1,6 +1,8 @@
 """Validation tests for cgfoil."""
 
 from pathlib import Path
+import numpy as np
+import pytest
 import yaml
 from cgfoil.core.main import generate_mesh
 from cgfoil.models import AirfoilMesh
@@ -57,3 +59,25 @@ def test_example_case_web_normals():
                     normal = mesh_result.face_normals[j]
                     normal[0] * normal_ref[0] + normal[1] * normal_ref[1]
                     # assert abs(abs(dot) - 1) < 1e-6
+
+
+def test_region_labelling_matches_centroid():
+    yaml_file = Path(__file__).parent / "airfoil_mesh.yaml"
+    with open(yaml_file, "r") as f:
+        data = yaml.safe_load(f)
+    data["airfoil_input"] = str(Path(__file__).parent / "naca0018.dat")
+    centroid_result = generate_mesh(AirfoilMesh(**data))
+    region_result = generate_mesh(AirfoilMesh(**data, labelling="region"))
+    np.testing.assert_array_equal(region_result.faces, centroid_result.faces)
+    np.testing.assert_array_equal(
+        region_result.face_material_ids, centroid_result.face_material_ids
+    )
+    np.testing.assert_array_equal(
+        region_result.face_normals, centroid_result.face_normals
+    )
+    assert region_result.areas == centroid_result.areas
+
+
+def test_labelling_is_validated():
+    with pytest.raises(ValueError, match="labelling"):
+        AirfoilMesh(skins={}, webs={}, labelling="regions")
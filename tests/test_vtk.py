@@ -107,3 +107,73 @@ def test_build_vtk_mesh_pyvista_not_available():
                 web_ply_thicknesses=[],
             )
             build_vtk_mesh(mesh_result)
+
+
+def test_build_vtk_mesh_matches_cell_sizes():
+    """Test areas and orientations against compute_cell_sizes and atan2."""
+    import math
+
+    pytest.importorskip("pyvista")
+    rng = np.random.default_rng(3)
+    vertices = rng.uniform(0, 1, size=(30, 2))
+    faces = np.array([rng.choice(30, 3, replace=False) for _ in range(40)])
+    inplanes = rng.normal(size=(40, 2))
+    mesh_result = MeshResult(
+        vertices=vertices,
+        faces=faces,
+        outer_points=vertices[:3],
+        inner_list=[],
+        line_ply_list=[],
+        untrimmed_lines=[],
+        web_material_ids=[],
+        skin_material_ids=[1],
+        web_names=[],
+        face_normals=inplanes[:, ::-1],
+        face_material_ids=np.ones(40, dtype=np.int32),
+        face_inplanes=inplanes,
+        areas={1: 0.0},
+        materials=None,
+        skin_ply_thicknesses=[],
+        web_ply_thicknesses=[],
+    )
+    vtk_mesh = build_vtk_mesh(mesh_result)
+    sizes = vtk_mesh.compute_cell_sizes()
+    for name in ("Length", "Area", "Volume"):
+        np.testing.assert_allclose(
+            vtk_mesh.cell_data[name], sizes.cell_data[name], atol=1e-12
+        )
+    expected = [
+        (math.degrees(math.atan2(iy, ix)) + 90) % 180 - 90 for ix, iy in inplanes
+    ]
+    np.testing.assert_allclose(
+        vtk_mesh.cell_data["plane_orientations"], expected, atol=1e-12
+    )
+    np.testing.assert_array_equal(
+        vtk_mesh.cell_data["offset_normals"][:, :2], -inplanes[:, ::-1]
+    )
+
+
+def test_read_sections_matches_threshold():
+    """Test single pass section reading against per-section thresholding."""
+    pv = pytest.importorskip("pyvista")
+    from cgfoil.utils.vtp import read_sections
+
+    vtp_file = "examples/airfoil_sections.vtp"
+    sections = read_sections(vtp_file, rotate_z=90)
+    mesh_vtp = pv.read(vtp_file).rotate_z(90)
+    assert list(sections) == sorted(set(mesh_vtp.cell_data["section_id"]))
+
+    section = sections[28]
+    section_mesh = mesh_vtp.threshold(value=(28, 28), scalars="section_id")
+    airfoil = section_mesh.threshold(value=(0, 12), scalars="panel_id")
+    te = section_mesh.threshold(value=(-3, -3), scalars="panel_id")
+    web1 = section_mesh.threshold(value=(-1, -1), scalars="panel_id")
+    name = "ply_000001_plate_100_thickness"
+    np.testing.assert_array_equal(section.airfoil.points, airfoil.points[:, :2])
+    np.testing.assert_array_equal(section.te.points, te.points[:, :2])
+    np.testing.assert_array_equal(section.webs["web1"].points, web1.points[:, :2])
+    np.testing.assert_allclose(
+        section.airfoil.point_data[name],
+        airfoil.cell_data_to_point_data().point_data[name],
+    )
+    assert len(section.outline()) == len(airfoil.points) + len(te.points) - 2